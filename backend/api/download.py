@@ -1,11 +1,108 @@
-def download_card(cart_data):
-    short_name = "recipe__ingredients_recipe__ingredient__measurement_unit"
-    print_cart_data = (
-        '\n'.join([
-            f'{item["recipe__ingredients_recipe__ingredient__name"]},'
-            f' {item["total_amount"]} - '
-            f'{item[short_name]}'
-            for item in cart_data
-        ])
+import csv
+import io
+from tempfile import SpooledTemporaryFile
+
+from django.conf import settings
+from django.db.models import DecimalField, F, Min, Sum
+from django.db.models.functions import Lower, Trim
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.pdfgen import canvas
+
+from recipes.models import ShoppingListItem
+from recipes.units import BASE_UNITS, alias_units, to_display_unit
+
+CHUNK_SIZE = 2000
+PDF_FONT_NAME = 'ShoppingListFont'
+PDF_FONT_SIZE = 12
+PDF_MARGIN = 50
+
+
+def get_shopping_list(user):
+    items = (
+        alias_units(
+            ShoppingListItem.objects.filter(user=user),
+            'ingredient__measurement_unit',
+        )
+        .values(
+            name_key=Lower(Trim('ingredient__name')),
+            unit=F('base_unit'),
+        )
+        .annotate(
+            name=Min(Trim('ingredient__name')),
+            raw_unit=Min(Trim('ingredient__measurement_unit')),
+            total=Sum(
+                F('amount') * F('unit_factor'), output_field=DecimalField()
+            ),
+        )
+        .order_by('name_key', 'unit')
+        .iterator(chunk_size=CHUNK_SIZE)
     )
-    return print_cart_data
+    for item in items:
+        unit = item['unit'] if item['unit'] in BASE_UNITS else item['raw_unit']
+        total_amount, measurement_unit = to_display_unit(item['total'], unit)
+        yield {
+            'name': item['name'],
+            'total_amount': total_amount,
+            'measurement_unit': measurement_unit,
+        }
+
+
+def download_card(cart_data):
+    for item in cart_data:
+        yield (
+            f'{item["name"]}, {item["total_amount"]} - '
+            f'{item["measurement_unit"]}\n'
+        )
+
+
+class _Echo:
+    def write(self, value):
+        return value
+
+
+def download_csv(cart_data):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(('Ингредиент', 'Количество', 'Единица измерения'))
+    for item in cart_data:
+        yield writer.writerow(
+            (item['name'], item['total_amount'], item['measurement_unit'])
+        )
+
+
+def register_pdf_font():
+    if PDF_FONT_NAME not in pdfmetrics.getRegisteredFontNames():
+        pdfmetrics.registerFont(
+            TTFont(PDF_FONT_NAME, settings.SHOPPING_LIST_PDF_FONT)
+        )
+
+
+def download_pdf(cart_data):
+    register_pdf_font()
+    return write_pdf(cart_data)
+
+
+def write_pdf(cart_data):
+    with SpooledTemporaryFile(max_size=io.DEFAULT_BUFFER_SIZE * 256) as file:
+        pdf = canvas.Canvas(file, pagesize=A4)
+        width, height = A4
+        y = height - PDF_MARGIN
+        pdf.setFont(PDF_FONT_NAME, PDF_FONT_SIZE)
+        for line in download_card(cart_data):
+            if y < PDF_MARGIN:
+                pdf.showPage()
+                pdf.setFont(PDF_FONT_NAME, PDF_FONT_SIZE)
+                y = height - PDF_MARGIN
+            pdf.drawString(PDF_MARGIN, y, line.rstrip('\n'))
+            y -= PDF_FONT_SIZE * 1.5
+        pdf.save()
+        file.seek(0)
+        yield from iter(lambda: file.read(io.DEFAULT_BUFFER_SIZE), b'')
+
+
+DOWNLOAD_FORMATS = {
+    'txt': download_card,
+    'csv': download_csv,
+    'pdf': download_pdf,
+}
@@ -1,30 +1,88 @@
 from django.contrib.auth import get_user_model
+from django.db.models import Exists, OuterRef
 from django_filters.rest_framework import FilterSet, filters
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import SearchFilter
 
-from recipes.models import Recipe
+from recipes.cache import tag_cache
+from recipes.models import Cart, Favorite, Recipe
+from recipes.search import search_ingredients, search_recipes
+from recipes.trending import order_by_trending
 
 User = get_user_model()
 
 
+def get_tag_choices():
+    return [(row['slug'], row['name']) for row in tag_cache.get_rows()]
+
+
 class RecipeFilter(FilterSet):
-    tags = filters.AllValuesMultipleFilter(
-        field_name='tags__slug',
+    tags = filters.MultipleChoiceFilter(
+        choices=get_tag_choices,
+        method='filter_tags',
     )
     is_favorited = filters.NumberFilter(method='filter_is_favorited')
     is_in_shopping_cart = filters.NumberFilter(
         method='filter_is_in_shopping_cart'
     )
+    search = filters.CharFilter(method='filter_search')
+    ordering = filters.ChoiceFilter(
+        choices=(('trending', 'trending'),),
+        method='filter_ordering',
+    )
 
     class Meta:
         model = Recipe
-        fields = ('tags', 'author', 'is_favorited', 'is_in_shopping_cart',)
+        fields = (
+            'tags', 'author', 'is_favorited', 'is_in_shopping_cart', 'search',
+            'ordering',
+        )
 
-    def filter_is_favorited(self, queryset, name, value):
+    def filter_tags(self, queryset, name, value):
+        if not value:
+            return queryset
+        tag_ids = [
+            row['id'] for row in tag_cache.get_rows() if row['slug'] in value
+        ]
+        return queryset.filter(Exists(
+            Recipe.tags.through.objects.filter(
+                recipe_id=OuterRef('pk'), tag_id__in=tag_ids
+            )
+        ))
+
+    def filter_search(self, queryset, name, value):
+        value = value.strip()
+        return search_recipes(queryset, value) if value else queryset
+
+    def filter_ordering(self, queryset, name, value):
+        if value != 'trending':
+            return queryset
+        if self.form.cleaned_data.get('search', '').strip():
+            raise ValidationError({
+                'ordering': 'Результаты поиска сортируются по релевантности, '
+                            'сортировка trending с поиском недоступна.'
+            })
+        return order_by_trending(queryset)
+
+    def filter_user_relation(self, queryset, model, value):
         if value and self.request.user.is_authenticated:
-            return queryset.filter(favorites__user=self.request.user)
+            return queryset.filter(Exists(
+                model.objects.filter(
+                    user=self.request.user, recipe_id=OuterRef('pk')
+                )
+            ))
         return queryset
 
+    def filter_is_favorited(self, queryset, name, value):
+        return self.filter_user_relation(queryset, Favorite, value)
+
     def filter_is_in_shopping_cart(self, queryset, name, value):
-        if value and self.request.user.is_authenticated:
-            return queryset.filter(carts__user=self.request.user)
-        return queryset
+        return self.filter_user_relation(queryset, Cart, value)
+
+
+class IngredientSearchFilter(SearchFilter):
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(self.search_param, '').strip()
+        if not query or view.action != 'list':
+            return queryset
+        return search_ingredients(query)
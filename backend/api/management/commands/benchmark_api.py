@@ -0,0 +1,222 @@
+import json
+import math
+import time
+from datetime import datetime
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from recipes.models import Ingredient, Recipe, Tag
+
+User = get_user_model()
+
+METRICS = ('p50', 'p95', 'p99', 'queries')
+
+
+def percentile(values, rank):
+    ordered = sorted(values)
+    return ordered[max(math.ceil(len(ordered) * rank / 100) - 1, 0)]
+
+
+def get_host():
+    for host in settings.ALLOWED_HOSTS:
+        if host != '*':
+            return host.lstrip('.')
+    return 'testserver'
+
+
+class Command(BaseCommand):
+    help = 'Measure latency and query counts of the main API endpoints'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=50)
+        parser.add_argument('--warmup', type=int, default=3)
+        parser.add_argument('--user', help='Email of the user to act as')
+        parser.add_argument(
+            '--scenario', action='append',
+            help='Run only the given scenarios'
+        )
+        parser.add_argument('--output', help='Write results to a JSON file')
+        parser.add_argument(
+            '--compare', help='Compare results with a JSON baseline'
+        )
+        parser.add_argument(
+            '--tolerance', type=float, default=10,
+            help='Allowed regression against the baseline, percent'
+        )
+        parser.add_argument(
+            '--strict', action='store_true',
+            help='Fail when a regression exceeds the tolerance'
+        )
+
+    def get_user(self, email):
+        if email is not None:
+            try:
+                return User.objects.get(email=email)
+            except User.DoesNotExist:
+                raise CommandError(f'Пользователь {email} не найден.')
+        user = (
+            User.objects
+            .annotate(follows=Count('follower'))
+            .order_by('-follows', 'pk')
+            .first()
+        )
+        if user is None:
+            raise CommandError(
+                'В базе нет пользователей, запустите generate_data.'
+            )
+        return user
+
+    def get_scenarios(self, user):
+        recipe_ids = list(
+            Recipe.objects.order_by('-favorites_count', 'pk')
+            .values_list('pk', flat=True)[:50]
+        )
+        tags = list(
+            Tag.objects.annotate(total=Count('recipes'))
+            .order_by('-total', 'pk').values_list('slug', flat=True)[:2]
+        )
+        prefixes = sorted({
+            name[:3] for name in
+            Ingredient.objects.order_by('pk').values_list('name', flat=True)
+            [:200:10]
+        })
+        words = sorted({
+            name.split()[0] for name in
+            Recipe.objects.order_by('pk').values_list('name', flat=True)[:50]
+        })
+        tag_query = '&'.join(f'tags={slug}' for slug in tags)
+        scenarios = {
+            'recipes.list': lambda n: '/api/recipes/',
+            'recipes.list.tags': lambda n: f'/api/recipes/?{tag_query}',
+            'recipes.list.author': (
+                lambda n: f'/api/recipes/?author={user.pk}'
+            ),
+            'recipes.list.favorited': (
+                lambda n: '/api/recipes/?is_favorited=1'
+            ),
+            'recipes.feed': lambda n: '/api/recipes/feed/',
+            'users.subscriptions': (
+                lambda n: '/api/users/subscriptions/?recipes_limit=3'
+            ),
+            'recipes.download_shopping_cart': (
+                lambda n: '/api/recipes/download_shopping_cart/'
+            ),
+        }
+        if recipe_ids:
+            scenarios['recipes.detail'] = (
+                lambda n: f'/api/recipes/{recipe_ids[n % len(recipe_ids)]}/'
+            )
+            scenarios['recipes.similar'] = (
+                lambda n: '/api/recipes/'
+                          f'{recipe_ids[n % len(recipe_ids)]}/similar/'
+            )
+        if words:
+            scenarios['recipes.search'] = (
+                lambda n: f'/api/recipes/?search={words[n % len(words)]}'
+            )
+        if prefixes:
+            scenarios['ingredients.search'] = (
+                lambda n: '/api/ingredients/?name='
+                          f'{prefixes[n % len(prefixes)]}'
+            )
+        return scenarios
+
+    def request(self, client, url):
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            response = client.get(url)
+            if response.streaming:
+                for _ in response.streaming_content:
+                    pass
+            elapsed = time.perf_counter() - started
+        if response.status_code != 200:
+            raise CommandError(f'{url}: статус {response.status_code}')
+        return elapsed, len(queries)
+
+    def run(self, client, build_url):
+        for number in range(self.options['warmup']):
+            self.request(client, build_url(number))
+        timings = []
+        queries = []
+        for number in range(self.options['requests']):
+            elapsed, count = self.request(client, build_url(number))
+            timings.append(elapsed)
+            queries.append(count)
+        return {
+            'requests': len(timings),
+            'throughput': round(len(timings) / sum(timings), 1),
+            'p50': round(percentile(timings, 50) * 1000, 2),
+            'p95': round(percentile(timings, 95) * 1000, 2),
+            'p99': round(percentile(timings, 99) * 1000, 2),
+            'queries': round(sum(queries) / len(queries), 1),
+        }
+
+    def compare(self, results, baseline):
+        regressions = []
+        for name, result in results.items():
+            previous = baseline['scenarios'].get(name)
+            if previous is None:
+                continue
+            changes = []
+            for metric in METRICS:
+                old, new = previous[metric], result[metric]
+                change = (new - old) / old * 100 if old else 0
+                mark = ''
+                if change > self.options['tolerance']:
+                    mark = '!'
+                    regressions.append(f'{name} {metric}')
+                changes.append(
+                    f'{metric} {old} -> {new} ({change:+.0f}%){mark}'
+                )
+            self.stdout.write(f'{name}: ' + ', '.join(changes))
+        return regressions
+
+    def handle(self, *args, **options):
+        self.options = options
+        user = self.get_user(options['user'])
+        token, _ = Token.objects.get_or_create(user=user)
+        client = APIClient(HTTP_HOST=get_host())
+        client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        scenarios = self.get_scenarios(user)
+        if options['scenario']:
+            unknown = set(options['scenario']) - set(scenarios)
+            if unknown:
+                raise CommandError(
+                    'Неизвестные сценарии: ' + ', '.join(sorted(unknown))
+                )
+            scenarios = {
+                name: scenarios[name] for name in options['scenario']
+            }
+        results = {}
+        for name, build_url in scenarios.items():
+            results[name] = self.run(client, build_url)
+            self.stdout.write(
+                f'{name}: {results[name]["throughput"]} rps, '
+                f'p50 {results[name]["p50"]} мс, '
+                f'p95 {results[name]["p95"]} мс, '
+                f'p99 {results[name]["p99"]} мс, '
+                f'запросов к БД {results[name]["queries"]}'
+            )
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                json.dump({
+                    'created': datetime.now().isoformat(timespec='seconds'),
+                    'user': user.email,
+                    'recipes': Recipe.objects.count(),
+                    'users': User.objects.count(),
+                    'scenarios': results,
+                }, file, ensure_ascii=False, indent=2)
+        if options['compare']:
+            with open(options['compare']) as file:
+                regressions = self.compare(results, json.load(file))
+            if regressions and options['strict']:
+                raise CommandError(
+                    'Регрессии: ' + ', '.join(regressions)
+                )
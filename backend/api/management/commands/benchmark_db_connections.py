@@ -0,0 +1,124 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connections
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from api.management.commands.benchmark_api import get_host, percentile
+from recipes.models import Ingredient
+
+User = get_user_model()
+
+MODES = {
+    'direct': {'CONN_MAX_AGE': 0, 'POOL': None},
+    'persistent': {'CONN_MAX_AGE': 60, 'POOL': None},
+    'pool': {'CONN_MAX_AGE': 0, 'POOL': {'max_size': 10, 'timeout': 5}},
+}
+
+
+class Command(BaseCommand):
+    help = 'Compare API throughput with and without connection reuse'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500)
+        parser.add_argument('--concurrency', type=int, default=4)
+        parser.add_argument('--pool-size', type=int, default=10)
+        parser.add_argument(
+            '--mode', action='append', choices=MODES,
+            help='Run only the given modes'
+        )
+        parser.add_argument(
+            '--anonymous', action='store_true',
+            help='Send requests without an authentication token'
+        )
+
+    def get_urls(self):
+        name = (
+            Ingredient.objects.order_by('pk')
+            .values_list('name', flat=True).first()
+        )
+        urls = {'tags': '/api/tags/'}
+        if name:
+            urls['ingredients'] = f'/api/ingredients/?name={name[:3]}'
+        return urls
+
+    def get_token(self):
+        if self.options['anonymous']:
+            return None
+        user = User.objects.order_by('pk').first()
+        if user is None:
+            raise CommandError(
+                'В базе нет пользователей, запустите generate_data.'
+            )
+        return Token.objects.get_or_create(user=user)[0].key
+
+    def work(self, url, count):
+        client = APIClient(HTTP_HOST=get_host())
+        if self.token:
+            client.credentials(HTTP_AUTHORIZATION=f'Token {self.token}')
+        timings = []
+        try:
+            for _ in range(count):
+                started = time.perf_counter()
+                response = client.get(url)
+                close_old_connections()
+                timings.append(time.perf_counter() - started)
+                if response.status_code != 200:
+                    raise CommandError(
+                        f'{url}: статус {response.status_code}'
+                    )
+        finally:
+            connections.close_all()
+        return timings
+
+    def run(self, url):
+        concurrency = self.options['concurrency']
+        counts = [
+            self.options['requests'] // concurrency
+            + (number < self.options['requests'] % concurrency)
+            for number in range(concurrency)
+        ]
+        started = time.perf_counter()
+        with ThreadPoolExecutor(concurrency) as executor:
+            timings = [
+                timing
+                for result in executor.map(self.work, [url] * concurrency,
+                                           counts)
+                for timing in result
+            ]
+        elapsed = time.perf_counter() - started
+        return {
+            'throughput': round(len(timings) / elapsed, 1),
+            'p50': round(percentile(timings, 50) * 1000, 2),
+            'p95': round(percentile(timings, 95) * 1000, 2),
+        }
+
+    def handle(self, *args, **options):
+        self.options = options
+        self.token = self.get_token()
+        urls = self.get_urls()
+        settings_dict = connections['default'].settings_dict
+        original = {name: settings_dict[name] for name in MODES['direct']}
+        connections.close_all()
+        try:
+            for mode in options['mode'] or MODES:
+                settings_dict.update(MODES[mode])
+                if settings_dict['POOL']:
+                    settings_dict['POOL'] = {
+                        **settings_dict['POOL'],
+                        'max_size': options['pool_size'],
+                    }
+                for name, url in urls.items():
+                    result = self.run(url)
+                    self.stdout.write(
+                        f'{mode} {name}: {result["throughput"]} rps, '
+                        f'p50 {result["p50"]} мс, p95 {result["p95"]} мс'
+                    )
+                pool = connections['default'].pool
+                if pool is not None:
+                    pool.clear()
+        finally:
+            settings_dict.update(original)
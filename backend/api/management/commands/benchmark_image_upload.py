@@ -0,0 +1,53 @@
+import base64
+import io
+import os
+import tracemalloc
+
+from django.core.management.base import BaseCommand
+from drf_extra_fields.fields import Base64ImageField
+from PIL import Image
+
+from api.serializers import RecipeImageField
+
+
+def make_data_uri(megabytes):
+    side = int((megabytes * 1024 * 1024 / 3) ** 0.5)
+    image = Image.frombytes('RGB', (side, side), os.urandom(side * side * 3))
+    buffer = io.BytesIO()
+    image.save(buffer, 'PNG', compress_level=1)
+    encoded = base64.b64encode(buffer.getvalue()).decode()
+    return f'data:image/png;base64,{encoded}', buffer.tell()
+
+
+def measure(field, data):
+    tracemalloc.start()
+    try:
+        upload = field.to_internal_value(data)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    upload.close()
+    return peak
+
+
+class Command(BaseCommand):
+    help = 'Compare peak memory of base64 image decoding strategies'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--megabytes', type=float, nargs='+', default=[1, 5, 10],
+            help='Image sizes to decode'
+        )
+
+    def handle(self, *args, **options):
+        for megabytes in options['megabytes']:
+            data, size = make_data_uri(megabytes)
+            for label, field in (
+                ('Base64ImageField', Base64ImageField()),
+                ('RecipeImageField', RecipeImageField()),
+            ):
+                peak = measure(field, data)
+                self.stdout.write(
+                    f'{size / 1024 / 1024:.1f} МБ / {label}: '
+                    f'пик памяти - {peak / 1024 / 1024:.1f} МБ'
+                )
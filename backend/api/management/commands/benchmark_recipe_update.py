@@ -0,0 +1,114 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from api.serializers import AddRecipeSerializer
+from recipes import shopping_list
+from recipes.models import Ingredient, Recipe, RecipeIngredient
+
+ROWS_WRITTEN_SQL = '''
+    SELECT COALESCE(SUM(n_tup_ins + n_tup_upd + n_tup_del), 0)
+    FROM pg_stat_xact_user_tables
+    WHERE relname IN (%s, %s)
+'''
+
+
+def legacy_update(recipe, validated_data):
+    recipe.tags.clear()
+    recipe.tags.set(validated_data['tags'])
+    recipe.ingredients.clear()
+    RecipeIngredient.objects.bulk_create([
+        RecipeIngredient(
+            recipe=recipe,
+            ingredient=item['ingredient']['id'],
+            amount=item['amount']
+        )
+        for item in validated_data['ingredients_recipe']
+    ])
+    shopping_list.change_recipe(
+        recipe.pk,
+        {},
+        {
+            item['ingredient']['id'].pk: item['amount']
+            for item in validated_data['ingredients_recipe']
+        }
+    )
+    recipe.save()
+
+
+def diff_update(recipe, validated_data):
+    AddRecipeSerializer().update(recipe, validated_data)
+
+
+def rows_written():
+    with connection.cursor() as cursor:
+        cursor.execute(ROWS_WRITTEN_SQL, (
+            RecipeIngredient._meta.db_table,
+            Recipe.tags.through._meta.db_table,
+        ))
+        return cursor.fetchone()[0]
+
+
+class Command(BaseCommand):
+    help = 'Compare queries and rows written by recipe update strategies'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipe', type=int, help='Recipe id')
+
+    def get_recipe(self, pk):
+        recipes = Recipe.objects.all()
+        if pk is not None:
+            recipes = recipes.filter(pk=pk)
+        for recipe in recipes.prefetch_related('tags')[:100]:
+            if recipe.ingredients_recipe.count() >= 2:
+                return recipe
+        raise CommandError('Нужен рецепт минимум с двумя ингредиентами.')
+
+    def get_scenarios(self, recipe):
+        tags = list(recipe.tags.all())
+        items = [
+            {'ingredient': {'id': item.ingredient}, 'amount': item.amount}
+            for item in recipe.ingredients_recipe.select_related('ingredient')
+        ]
+        used = [item['ingredient']['id'].pk for item in items]
+        extra = Ingredient.objects.exclude(pk__in=used).first()
+        changed = [dict(item) for item in items]
+        changed[0]['amount'] += 1
+        scenarios = {
+            'без изменений': items,
+            'изменено количество': changed,
+            'удален ингредиент': items[1:],
+        }
+        if extra is not None:
+            scenarios['добавлен ингредиент'] = items + [
+                {'ingredient': {'id': extra}, 'amount': 1}
+            ]
+        return {
+            name: {'tags': tags, 'ingredients_recipe': ingredients}
+            for name, ingredients in scenarios.items()
+        }
+
+    def measure(self, update, recipe_id, validated_data):
+        with transaction.atomic():
+            recipe = Recipe.objects.get(pk=recipe_id)
+            rows_before = rows_written()
+            with CaptureQueriesContext(connection) as queries:
+                update(recipe, dict(validated_data))
+            written = rows_written() - rows_before
+            transaction.set_rollback(True)
+        return len(queries), written
+
+    def handle(self, *args, **options):
+        recipe = self.get_recipe(options['recipe'])
+        for name, validated_data in self.get_scenarios(recipe).items():
+            for label, update in (
+                ('clear+create', legacy_update),
+                ('diff', diff_update),
+            ):
+                queries, written = self.measure(
+                    update, recipe.pk, validated_data
+                )
+                self.stdout.write(
+                    f'{name} / {label}: запросов - {queries}, '
+                    f'записано строк - {written}'
+                )
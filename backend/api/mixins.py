@@ -0,0 +1,152 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import Http404, HttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+from recipes.cache import (RECIPES_VERSION_KEY, USERS_VERSION_KEY,
+                           get_user_sets, get_version, ingredient_cache,
+                           record_cache_access, tag_cache)
+
+
+class ConditionalGetMixin:
+    def get_validators(self, request):
+        return None, None
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().list, request, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().retrieve, request, *args, **kwargs
+        )
+
+    def conditional_response(self, handler, request, *args, **kwargs):
+        etag_parts, last_modified = self.get_validators(request)
+        etag = None
+        if etag_parts is not None:
+            etag_parts = (
+                request.get_full_path(),
+                request.accepted_renderer.format,
+                request.user.pk,
+                *etag_parts,
+            )
+            etag = quote_etag(
+                hashlib.md5(repr(etag_parts).encode()).hexdigest()
+            )
+        if last_modified is not None:
+            last_modified = int(last_modified.timestamp())
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is None:
+            response = handler(request, *args, **kwargs)
+        if response.status_code in (200, 304):
+            if etag is not None:
+                response['ETag'] = etag
+            if last_modified is not None:
+                response['Last-Modified'] = http_date(last_modified)
+        patch_vary_headers(response, ('Authorization',))
+        return response
+
+
+class ReferenceCacheMixin:
+    reference_cache = None
+    reference_filter_params = ()
+
+    def list(self, request, *args, **kwargs):
+        if any(
+            request.query_params.get(param)
+            for param in self.reference_filter_params
+        ):
+            return super().list(request, *args, **kwargs)
+        if isinstance(request.accepted_renderer, JSONRenderer):
+            return HttpResponse(
+                self.reference_cache.get_json(),
+                content_type='application/json'
+            )
+        return Response(self.reference_cache.get_rows())
+
+    def retrieve(self, request, *args, **kwargs):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        try:
+            pk = int(self.kwargs[lookup_url_kwarg])
+        except ValueError:
+            raise Http404
+        row = self.reference_cache.get_row(pk)
+        if row is None:
+            raise Http404
+        return Response(row)
+
+
+class RecipeListCacheMixin:
+    list_cache_name = 'recipe_list'
+    user_filter_params = ('is_favorited', 'is_in_shopping_cart')
+    shared_list = False
+
+    def is_list_cacheable(self, request):
+        if settings.RECIPE_LIST_CACHE_TIMEOUT <= 0:
+            return False
+        return not request.user.is_authenticated or not any(
+            request.query_params.get(param, '0') != '0'
+            for param in self.user_filter_params
+        )
+
+    def get_ordering_version(self):
+        return None
+
+    def get_list_cache_key(self, request):
+        key_parts = (
+            request.build_absolute_uri(),
+            request.accepted_renderer.format,
+            get_version(RECIPES_VERSION_KEY),
+            get_version(USERS_VERSION_KEY),
+            self.get_ordering_version(),
+            tag_cache.version,
+            ingredient_cache.version,
+        )
+        digest = hashlib.md5(repr(key_parts).encode()).hexdigest()
+        return f'response:{self.list_cache_name}:{digest}'
+
+    def list(self, request, *args, **kwargs):
+        if not self.is_list_cacheable(request):
+            return super().list(request, *args, **kwargs)
+        key = self.get_list_cache_key(request)
+        data = cache.get(key)
+        record_cache_access(self.list_cache_name, data is not None)
+        if data is None:
+            self.shared_list = True
+            response = super().list(request, *args, **kwargs)
+            self.shared_list = False
+            if response.status_code != 200:
+                return response
+            data = response.data
+            cache.set(key, data, timeout=settings.RECIPE_LIST_CACHE_TIMEOUT)
+        return Response(self.apply_user_flags(request.user, data))
+
+    def apply_user_flags(self, user, data):
+        if not user.is_authenticated:
+            return data
+        sets = get_user_sets(user)
+        return {
+            **data,
+            'results': [
+                {
+                    **recipe,
+                    'author': {
+                        **recipe['author'],
+                        'is_subscribed':
+                            recipe['author']['id'] in sets['follows'],
+                    },
+                    'is_favorited': recipe['id'] in sets['favorites'],
+                    'is_in_shopping_cart': recipe['id'] in sets['carts'],
+                }
+                for recipe in data['results']
+            ],
+        }
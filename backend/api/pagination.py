@@ -1,6 +1,192 @@
-from rest_framework.pagination import PageNumberPagination
+import base64
+import json
+from collections import OrderedDict
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework import serializers
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
 
 
 class MyPageNumberPagination(PageNumberPagination):
     page_size = 6
     page_size_query_param = 'limit'
+
+
+class KeysetPagination(BasePagination):
+    page_size = 6
+    page_size_query_param = 'limit'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+    ordering = ('-pub_date', '-id')
+    invalid_cursor_message = 'Некорректный курсор.'
+    unsupported_ordering_message = (
+        'Курсорная пагинация поддерживает только сортировку по дате '
+        'и trending, используйте постраничную пагинацию.'
+    )
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            cursor = json.loads(base64.urlsafe_b64decode(encoded.encode()))
+            position, reverse = cursor['p'], bool(cursor['r'])
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(position, list) or (
+            len(position) != len(self.ordering)
+        ) or None in position:
+            raise NotFound(self.invalid_cursor_message)
+        return position, reverse
+
+    @staticmethod
+    def get_ordering_field(queryset, name):
+        annotation = queryset.query.annotations.get(name)
+        if annotation is not None:
+            return annotation.output_field
+        return queryset.model._meta.get_field(name)
+
+    def parse_position(self, queryset, position):
+        values = []
+        for field, value in zip(self.ordering, position):
+            try:
+                value = self.get_ordering_field(
+                    queryset, field.lstrip('-')
+                ).to_python(value)
+            except (FieldDoesNotExist, ValidationError, TypeError):
+                raise NotFound(self.invalid_cursor_message)
+            if value is None or (
+                hasattr(value, 'tzinfo') and timezone.is_naive(value)
+            ):
+                raise NotFound(self.invalid_cursor_message)
+            values.append(value)
+        return values
+
+    def encode_cursor(self, instance, reverse):
+        position = []
+        for field in self.ordering:
+            value = getattr(instance, field.lstrip('-'))
+            if hasattr(value, 'isoformat'):
+                value = value.isoformat()
+            position.append(value)
+        cursor = json.dumps({'p': position, 'r': int(reverse)})
+        encoded = base64.urlsafe_b64encode(cursor.encode()).decode()
+        return replace_query_param(
+            self.base_url, self.cursor_query_param, encoded
+        )
+
+    @staticmethod
+    def invert(ordering):
+        return tuple(
+            field[1:] if field.startswith('-') else f'-{field}'
+            for field in ordering
+        )
+
+    @staticmethod
+    def keyset_filter(ordering, position):
+        condition = Q()
+        equal = Q()
+        for field, value in zip(ordering, position):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            condition |= equal & Q(**{f'{name}__{lookup}': value})
+            equal &= Q(**{name: value})
+        return condition
+
+    def get_count(self, queryset, request):
+        if request.query_params.get(self.count_query_param) in (
+            'false', '0'
+        ):
+            return None
+        return queryset.count()
+
+    def check_ordering(self, queryset):
+        order_by = tuple(queryset.query.order_by)
+        if order_by and order_by != tuple(self.ordering):
+            raise serializers.ValidationError({
+                'pagination': self.unsupported_ordering_message
+            })
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.ordering = getattr(view, 'keyset_ordering', self.ordering)
+        self.check_ordering(queryset)
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        cursor = self.decode_cursor(request)
+        self.count = self.get_count(queryset, request)
+        ordering = self.ordering
+        reverse = False
+        if cursor is not None:
+            position, reverse = cursor
+            position = self.parse_position(queryset, position)
+            if reverse:
+                ordering = self.invert(ordering)
+            queryset = queryset.filter(self.keyset_filter(ordering, position))
+        page = list(queryset.order_by(*ordering)[:self.page_size + 1])
+        has_more = len(page) > self.page_size
+        page = page[:self.page_size]
+        if reverse:
+            page.reverse()
+        self.next = self.previous = None
+        if page and (has_more or reverse):
+            self.next = self.encode_cursor(page[-1], reverse=False)
+        if page and (has_more if reverse else cursor is not None):
+            self.previous = self.encode_cursor(page[0], reverse=True)
+        if not page and cursor is not None:
+            self.previous = remove_query_param(
+                self.base_url, self.cursor_query_param
+            )
+        return page
+
+    def get_paginated_response(self, data):
+        response = OrderedDict()
+        if self.count is not None:
+            response['count'] = self.count
+        response['next'] = self.next
+        response['previous'] = self.previous
+        response['results'] = data
+        return Response(response)
+
+
+class FeedPagination(KeysetPagination):
+    def get_count(self, queryset, request):
+        return None
+
+
+class OptionalKeysetPagination(MyPageNumberPagination):
+    pagination_query_param = 'pagination'
+    keyset_pagination_class = KeysetPagination
+
+    def keyset_requested(self, request):
+        return (
+            request.query_params.get(self.pagination_query_param) == 'cursor'
+            or self.keyset_pagination_class.cursor_query_param
+            in request.query_params
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+        if self.keyset_requested(request):
+            self.keyset = self.keyset_pagination_class()
+            return self.keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
@@ -0,0 +1,34 @@
+from django.conf import settings
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from rest_framework.parsers import JSONParser, MultiPartParser
+
+
+class RequestTooLarge(APIException):
+    status_code = status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+    default_detail = 'Размер запроса превышает допустимый.'
+    default_code = 'request_too_large'
+
+
+class BodySizeLimitMixin:
+    def parse(self, stream, media_type=None, parser_context=None):
+        request = parser_context['request']
+        try:
+            length = int(request.META.get('CONTENT_LENGTH') or 0)
+        except ValueError:
+            length = 0
+        max_length = (
+            settings.RECIPE_IMAGE_MAX_SIZE * 4 // 3
+            + settings.DATA_UPLOAD_MAX_MEMORY_SIZE
+        )
+        if length > max_length:
+            raise RequestTooLarge()
+        return super().parse(stream, media_type, parser_context)
+
+
+class RecipeJSONParser(BodySizeLimitMixin, JSONParser):
+    pass
+
+
+class RecipeMultiPartParser(BodySizeLimitMixin, MultiPartParser):
+    pass
@@ -0,0 +1,248 @@
+import logging
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+from contextlib import ExitStack
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+from rest_framework.serializers import BaseSerializer
+
+logger = logging.getLogger(__name__)
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+METRICS = {
+    'duration': ('foodgram_request_duration_seconds', DURATION_BUCKETS),
+    'sql_duration': ('foodgram_sql_duration_seconds', DURATION_BUCKETS),
+    'serializer_duration': (
+        'foodgram_serializer_duration_seconds', DURATION_BUCKETS
+    ),
+    'queries': ('foodgram_sql_queries', (1, 2, 5, 10, 20, 50, 100, 200)),
+}
+
+current_profile = ContextVar('current_profile', default=None)
+
+
+class RequestProfile:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.duration = 0
+        self.endpoint = None
+        self.queries = 0
+        self.sql_duration = 0
+        self.serializer_duration = 0
+        self.serializer_depth = 0
+        self.statements = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql_duration += time.perf_counter() - started
+            self.queries += 1
+            self.statements[sql] += 1
+
+    def finish(self):
+        self.duration = time.perf_counter() - self.started
+
+    def get_server_timing(self):
+        return ', '.join((
+            f'sql;dur={self.sql_duration * 1000:.1f};'
+            f'desc="{self.queries} queries"',
+            f'serializer;dur={self.serializer_duration * 1000:.1f}',
+            f'total;dur={self.duration * 1000:.1f}',
+        ))
+
+    def get_duplicates(self):
+        threshold = max(settings.PROFILING_DUPLICATE_QUERY_THRESHOLD, 2)
+        return [
+            (sql, count) for sql, count in self.statements.most_common()
+            if count >= threshold
+        ]
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def snapshot(self):
+        buckets = {}
+        total = 0
+        for bound, count in zip(self.buckets + ('+Inf',), self.counts):
+            total += count
+            buckets[str(bound)] = total
+        return {'buckets': buckets, 'sum': self.sum, 'count': self.count}
+
+
+class ProfileRegistry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.endpoints = {}
+
+    def observe(self, profile):
+        with self.lock:
+            histograms = self.endpoints.setdefault(profile.endpoint, {
+                name: Histogram(buckets)
+                for name, (_, buckets) in METRICS.items()
+            })
+            for name, histogram in histograms.items():
+                histogram.observe(getattr(profile, name))
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                endpoint: {
+                    name: histogram.snapshot()
+                    for name, histogram in histograms.items()
+                }
+                for endpoint, histograms in sorted(self.endpoints.items())
+            }
+
+    def reset(self):
+        with self.lock:
+            self.endpoints.clear()
+
+
+registry = ProfileRegistry()
+
+
+def escape_label(value):
+    return (
+        str(value).replace('\\', '\\\\').replace('"', '\\"')
+        .replace('\n', '\\n')
+    )
+
+
+def to_prometheus(report):
+    lines = []
+    for name, (metric, _) in METRICS.items():
+        lines.append(f'# TYPE {metric} histogram')
+        for endpoint, histograms in report['endpoints'].items():
+            endpoint = escape_label(endpoint)
+            histogram = histograms[name]
+            for bound, count in histogram['buckets'].items():
+                lines.append(
+                    f'{metric}_bucket{{endpoint="{endpoint}",le="{bound}"}} '
+                    f'{count}'
+                )
+            lines.append(
+                f'{metric}_sum{{endpoint="{endpoint}"}} {histogram["sum"]}'
+            )
+            lines.append(
+                f'{metric}_count{{endpoint="{endpoint}"}} '
+                f'{histogram["count"]}'
+            )
+    for name in ('hits', 'misses'):
+        metric = f'foodgram_cache_{name}_total'
+        lines.append(f'# TYPE {metric} counter')
+        for cache_name, stats in report['caches'].items():
+            lines.append(
+                f'{metric}{{cache="{escape_label(cache_name)}"}} '
+                f'{stats[name]}'
+            )
+    return '\n'.join(lines) + '\n'
+
+
+def get_endpoint(request, view_func):
+    view_class = getattr(view_func, 'cls', None)
+    if view_class is None:
+        return f'{view_func.__module__}.{view_func.__name__}'
+    method = request.method.lower()
+    actions = getattr(view_func, 'actions', None) or {}
+    return f'{view_class.__name__}.{actions.get(method, method)}'
+
+
+def profiled_serializer_data(data):
+    def wrapper(serializer):
+        profile = current_profile.get()
+        if profile is None or profile.serializer_depth:
+            return data.fget(serializer)
+        profile.serializer_depth += 1
+        started = time.perf_counter()
+        try:
+            return data.fget(serializer)
+        finally:
+            profile.serializer_depth -= 1
+            profile.serializer_duration += time.perf_counter() - started
+    wrapper.profiled = True
+    return property(wrapper)
+
+
+def install():
+    if not getattr(BaseSerializer.data.fget, 'profiled', False):
+        BaseSerializer.data = profiled_serializer_data(BaseSerializer.data)
+
+
+class ProfiledStream:
+    def __init__(self, content, on_close):
+        self.content = iter(content)
+        self.on_close = on_close
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        try:
+            return next(self.content)
+        except StopIteration:
+            self.close()
+            raise
+
+    def close(self):
+        if self.on_close is not None:
+            on_close, self.on_close = self.on_close, None
+            on_close()
+
+
+class ProfilingMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+        install()
+
+    def __call__(self, request):
+        profile = RequestProfile()
+        stack = ExitStack()
+        token = current_profile.set(profile)
+        try:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(profile))
+            response = self.get_response(request)
+        except BaseException:
+            stack.close()
+            raise
+        finally:
+            current_profile.reset(token)
+        if response.streaming:
+            stack.callback(self.record, profile)
+            response.streaming_content = ProfiledStream(
+                response.streaming_content, stack.close
+            )
+            return response
+        stack.close()
+        self.record(profile)
+        response['Server-Timing'] = profile.get_server_timing()
+        return response
+
+    def record(self, profile):
+        profile.finish()
+        profile.endpoint = profile.endpoint or 'unmatched'
+        registry.observe(profile)
+        for sql, count in profile.get_duplicates():
+            logger.warning(
+                'Возможный N+1 в %s: запрос выполнен %d раз: %s',
+                profile.endpoint, count, sql
+            )
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        current_profile.get().endpoint = get_endpoint(request, view_func)
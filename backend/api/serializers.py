@@ -1,9 +1,13 @@
 from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import UploadedFile
+from django.db import transaction
 from djoser.serializers import UserCreateSerializer, UserSerializer
-from drf_extra_fields.fields import Base64ImageField
 from rest_framework import serializers, status
 from rest_framework.exceptions import ValidationError
 
+from api.uploads import check_upload, decode_data_uri
+from recipes import images, pantry, shopping_list
+from recipes.cache import ingredient_cache, tag_cache
 from recipes.models import (Cart, Favorite, Ingredient, Recipe,
                             RecipeIngredient, Tag)
 from users.models import Follow
@@ -11,6 +15,58 @@ from users.models import Follow
 User = get_user_model()
 
 
+class CachedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    def __init__(self, reference_cache, **kwargs):
+        self.reference_cache = reference_cache
+        super().__init__(**kwargs)
+
+    def to_internal_value(self, data):
+        if isinstance(data, bool):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        try:
+            pk = int(data)
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        instance = self.reference_cache.get_instance(pk)
+        if instance is None:
+            self.fail('does_not_exist', pk_value=data)
+        return instance
+
+
+def get_recipes_limit(request):
+    limit = request.query_params.get('recipes_limit')
+    if limit is None:
+        return None
+    try:
+        limit = int(limit)
+    except ValueError:
+        limit = -1
+    if limit < 0:
+        raise ValidationError(
+            {'recipes_limit': 'Значение должно быть целым числом >= 0.'},
+            code=status.HTTP_400_BAD_REQUEST
+        )
+    return limit
+
+
+class ImageSrcsetField(serializers.ReadOnlyField):
+    def __init__(self, **kwargs):
+        kwargs['source'] = '*'
+        super().__init__(**kwargs)
+
+    def to_representation(self, recipe):
+        return images.get_srcset(recipe, self.context.get('request'))
+
+
+class RecipeImageField(serializers.ImageField):
+    def to_internal_value(self, data):
+        if isinstance(data, str):
+            data = decode_data_uri(data)
+        elif isinstance(data, UploadedFile):
+            check_upload(data)
+        return super().to_internal_value(data)
+
+
 class CustomUserCreateSerializer(UserCreateSerializer):
     class Meta(UserCreateSerializer.Meta):
         model = User
@@ -46,6 +102,8 @@ class CustomUserSerializer(UserSerializer):
         )
 
     def get_is_subscribed(self, obj):
+        if hasattr(obj, 'is_subscribed'):
+            return obj.is_subscribed
         user = self.context.get('request').user
         if user.is_anonymous:
             return False
@@ -65,16 +123,18 @@ class FollowSerializer(CustomUserSerializer):
         read_only_fields = ('email', 'username')
 
     def get_recipes(self, obj):
-        recipes = obj.recipes.all()
-        limit = self.context.get('request').query_params.get('recipes_limit')
-        if limit is not None:
-            limit = int(limit)
-            recipes = recipes[:limit]
+        if hasattr(obj, 'latest_recipes'):
+            recipes = obj.latest_recipes
+        else:
+            recipes = obj.recipes.all()
+            limit = get_recipes_limit(self.context.get('request'))
+            if limit is not None:
+                recipes = recipes[:limit]
         serializer = ShortRecipeSerializer(recipes, many=True, read_only=True)
         return serializer.data
 
     def get_recipes_count(self, obj):
-        return obj.recipes.count()
+        return obj.recipes_count
 
 
 class CreateFollowSerializer(serializers.ModelSerializer):
@@ -148,14 +208,37 @@ class AddToFavoriteSerializer(serializers.ModelSerializer):
         ).data
 
 
+class BulkRecipesSerializer(serializers.Serializer):
+    recipes = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=100,
+    )
+
+    def validate_recipes(self, recipes):
+        return list(dict.fromkeys(recipes))
+
+
+class PantrySerializer(serializers.Serializer):
+    ingredients = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=200,
+    )
+    max_missing = serializers.IntegerField(min_value=0, required=False)
+
+
 class ShortRecipeSerializer(serializers.ModelSerializer):
+    image_srcset = ImageSrcsetField()
+
     class Meta:
         model = Recipe
         fields = (
             'id',
             'name',
             'cooking_time',
-            'image'
+            'image',
+            'image_srcset'
         )
         read_only_fields = ('__all__',)
 
@@ -182,7 +265,8 @@ class IngredientSerializer(serializers.ModelSerializer):
 
 
 class IngredientInRecipeSerializer(serializers.ModelSerializer):
-    id = serializers.PrimaryKeyRelatedField(
+    id = CachedPrimaryKeyRelatedField(
+        reference_cache=ingredient_cache,
         queryset=Ingredient.objects.all(),
         source='ingredient.id'
     )
@@ -214,12 +298,14 @@ class RecipeSerializer(serializers.ModelSerializer):
     tags = TagSerializer(many=True)
     is_favorited = serializers.SerializerMethodField()
     is_in_shopping_cart = serializers.SerializerMethodField()
+    image_srcset = ImageSrcsetField()
 
     class Meta:
         fields = (
             'id',
             'name',
             'image',
+            'image_srcset',
             'text',
             'cooking_time',
             'author',
@@ -235,11 +321,15 @@ class RecipeSerializer(serializers.ModelSerializer):
         return IngredientInRecipeSerializer(ingredients, many=True).data
 
     def get_is_favorited(self, obj):
+        if hasattr(obj, 'is_favorited'):
+            return obj.is_favorited
         user = self.context.get('request').user
         return (user.is_authenticated
                 and user.favorites.filter(recipe=obj).exists())
 
     def get_is_in_shopping_cart(self, obj):
+        if hasattr(obj, 'is_in_shopping_cart'):
+            return obj.is_in_shopping_cart
         user = self.context.get('request').user
         return user.is_authenticated and user.carts.filter(recipe=obj).exists()
 
@@ -250,11 +340,12 @@ class AddRecipeSerializer(serializers.ModelSerializer):
         source='ingredients_recipe',
     )
     author = CustomUserSerializer(read_only=True)
-    tags = serializers.PrimaryKeyRelatedField(
+    tags = CachedPrimaryKeyRelatedField(
+        reference_cache=tag_cache,
         many=True,
         queryset=Tag.objects.all(),
     )
-    image = Base64ImageField(
+    image = RecipeImageField(
         max_length=None, use_url=True,
     )
 
@@ -323,20 +414,66 @@ class AddRecipeSerializer(serializers.ModelSerializer):
 
         RecipeIngredient.objects.bulk_create(recipe_ingredients)
 
+    @transaction.atomic
     def create(self, validated_data):
         ingredients_data = validated_data.pop('ingredients_recipe')
         tags = validated_data.pop('tags')
         recipe = Recipe.objects.create(**validated_data)
         recipe.tags.set(tags)
         self._create_ingredients(ingredients_data, recipe)
+        pantry.record_change(recipe.pk, (), [
+            item['ingredient']['id'].pk for item in ingredients_data
+        ])
         return recipe
 
+    def _update_ingredients(self, ingredients_data, recipe):
+        existing = {
+            item.ingredient_id: item
+            for item in recipe.ingredients_recipe.all()
+        }
+        old_amounts = {
+            ingredient_id: item.amount
+            for ingredient_id, item in existing.items()
+        }
+        new_amounts = {
+            item['ingredient']['id'].pk: item['amount']
+            for item in ingredients_data
+        }
+        removed = [
+            item.pk for ingredient_id, item in existing.items()
+            if ingredient_id not in new_amounts
+        ]
+        changed = []
+        created = []
+        for ingredient_id, amount in new_amounts.items():
+            item = existing.get(ingredient_id)
+            if item is None:
+                created.append(RecipeIngredient(
+                    recipe=recipe,
+                    ingredient_id=ingredient_id,
+                    amount=amount
+                ))
+            elif item.amount != amount:
+                item.amount = amount
+                changed.append(item)
+        if removed:
+            RecipeIngredient.objects.filter(pk__in=removed).delete()
+        if changed:
+            RecipeIngredient.objects.bulk_update(changed, ('amount',))
+        if created:
+            RecipeIngredient.objects.bulk_create(created)
+        kept_amounts = {
+            ingredient_id: amount
+            for ingredient_id, amount in old_amounts.items()
+            if ingredient_id in new_amounts
+        }
+        shopping_list.change_recipe(recipe.pk, kept_amounts, new_amounts)
+        pantry.record_change(recipe.pk, kept_amounts, new_amounts)
+
+    @transaction.atomic
     def update(self, instance, validated_data):
-        recipe = instance
-        tags = validated_data.pop('tags')
-        new_ingridients = validated_data.pop('ingredients_recipe')
-        instance.tags.clear()
-        instance.tags.set(tags)
-        instance.ingredients.clear()
-        self._create_ingredients(new_ingridients, recipe)
+        instance.tags.set(validated_data.pop('tags'))
+        self._update_ingredients(
+            validated_data.pop('ingredients_recipe'), instance
+        )
         return super().update(instance, validated_data)
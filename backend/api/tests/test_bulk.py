@@ -0,0 +1,86 @@
+from unittest import mock
+
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from recipes import bulk
+from recipes.models import Cart, Favorite, Recipe, ShoppingListItem
+from recipes.tests.factories import (create_ingredients, create_recipes,
+                                     create_user)
+
+
+class BulkAddTests(TestCase):
+    def setUp(self):
+        self.user = create_user(1, token=True)
+        self.client = APIClient()
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f'Token {self.user.auth_token.key}'
+        )
+        self.ingredients = create_ingredients(2)
+        self.recipes = create_recipes(self.user, 3, self.ingredients)
+        self.ids = [recipe.pk for recipe in self.recipes]
+
+    def bulk_add(self, url, recipe_ids):
+        response = self.client.post(
+            url, {'recipes': recipe_ids}, format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        return {
+            item['id']: item['status'] for item in response.data['results']
+        }
+
+    def assertCounters(self, field, expected):
+        self.assertEqual(
+            dict(Recipe.objects.filter(pk__in=self.ids)
+                 .values_list('pk', field)),
+            expected,
+        )
+
+    def assertShoppingList(self, amount):
+        self.assertEqual(
+            set(ShoppingListItem.objects.filter(user=self.user)
+                .values_list('ingredient_id', 'amount')),
+            {(ingredient.pk, amount) for ingredient in self.ingredients},
+        )
+
+    def test_repeated_bulk_add_counts_once(self):
+        url = '/api/recipes/shopping_cart/'
+        first, second = self.ids[:2]
+        missing = max(self.ids) + 1
+        self.assertEqual(
+            self.bulk_add(url, [first, second, missing]),
+            {first: 'created', second: 'created', missing: 'not_found'},
+        )
+        self.assertEqual(
+            self.bulk_add(url, [first, second]),
+            {first: 'exists', second: 'exists'},
+        )
+        self.assertEqual(Cart.objects.filter(user=self.user).count(), 2)
+        self.assertCounters(
+            'carts_count', {first: 1, second: 1, self.ids[2]: 0}
+        )
+        self.assertShoppingList(20)
+
+    def test_single_add_between_lookup_and_insert(self):
+        first, second = self.ids[:2]
+        find_recipes = bulk._find_recipes
+        for action in ('favorite', 'shopping_cart'):
+            def concurrent_single_add(recipe_ids):
+                found = find_recipes(recipe_ids)
+                response = self.client.post(f'/api/recipes/{first}/{action}/')
+                self.assertEqual(response.status_code, 201)
+                return found
+
+            with mock.patch.object(
+                bulk, '_find_recipes', side_effect=concurrent_single_add
+            ):
+                self.assertEqual(
+                    self.bulk_add(f'/api/recipes/{action}/', [first, second]),
+                    {first: 'exists', second: 'created'},
+                )
+        for model, field in (
+            (Favorite, 'favorites_count'), (Cart, 'carts_count')
+        ):
+            self.assertEqual(model.objects.filter(user=self.user).count(), 2)
+            self.assertCounters(field, {first: 1, second: 1, self.ids[2]: 0})
+        self.assertShoppingList(20)
@@ -0,0 +1,50 @@
+from functools import partial
+from unittest import mock
+
+from django.db import connection
+from django.test import SimpleTestCase
+from psycopg2 import OperationalError
+
+from foodgram.postgresql.pool import ConnectionPool
+
+
+class ConnectionPoolTests(SimpleTestCase):
+    databases = {'default'}
+
+    def setUp(self):
+        self.pool = ConnectionPool(
+            partial(
+                connection.get_new_connection,
+                connection.get_connection_params(),
+            ),
+            max_size=2, timeout=0.1,
+        )
+        self.addCleanup(self.pool.closeall)
+
+    def test_only_reused_connections_are_checked(self):
+        check = mock.Mock(return_value=True)
+        first = self.pool.get(check)
+        check.assert_not_called()
+        self.pool.put(first)
+        self.assertIs(self.pool.get(check), first)
+        check.assert_called_once_with(first)
+
+    def test_unusable_and_discarded_connections_are_replaced(self):
+        first = self.pool.get()
+        self.pool.put(first)
+        second = self.pool.get(mock.Mock(return_value=False))
+        self.assertIsNot(second, first)
+        self.assertTrue(first.closed)
+        self.pool.put(second, discard=True)
+        self.assertTrue(second.closed)
+        self.assertEqual(self.pool._pool, [])
+
+    def test_exhausted_pool_times_out(self):
+        connections = [self.pool.get(), self.pool.get()]
+        with self.assertRaises(OperationalError):
+            self.pool.get()
+        self.pool.put(connections.pop())
+        connections.append(self.pool.get())
+        for item in connections:
+            self.pool.put(item)
+        self.assertEqual(len(self.pool._pool), 2)
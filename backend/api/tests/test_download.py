@@ -0,0 +1,98 @@
+from pathlib import Path
+from unittest import mock, skipUnless
+
+from django.conf import settings
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from api.download import get_shopping_list
+from recipes.models import Ingredient, ShoppingListItem
+from recipes.tests.factories import create_user
+
+
+class ShoppingListDownloadTests(TestCase):
+    def setUp(self):
+        self.user = create_user(1, token=True)
+        self.client = APIClient()
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f'Token {self.user.auth_token.key}'
+        )
+        items = (
+            ('сахар', 'г', 700),
+            ('сахар', 'кг', 2),
+            ('Сахар ', 'Г.', 5),
+            ('молоко', 'мл', 300),
+            ('молоко', 'л', 1),
+            ('яйца', 'шт.', 3),
+            ('яйца', 'шт', 2),
+            ('мука', 'ст.л.', 2),
+            ('мука', 'ст. л.', 1),
+            ('соль', 'по вкусу', 1),
+            ('соль', 'г', 10),
+        )
+        ShoppingListItem.objects.bulk_create(
+            ShoppingListItem(
+                user=self.user,
+                ingredient=Ingredient.objects.create(
+                    name=name, measurement_unit=unit
+                ),
+                amount=amount,
+            )
+            for name, unit, amount in items
+        )
+
+    def test_equivalent_units_are_merged(self):
+        with self.assertNumQueries(1):
+            shopping_list = [
+                (item['name'], str(item['total_amount']),
+                 item['measurement_unit'])
+                for item in get_shopping_list(self.user)
+            ]
+        self.assertEqual(shopping_list, [
+            ('молоко', '1.3', 'л'),
+            ('мука', '3', 'ст. л.'),
+            ('Сахар', '2.705', 'кг'),
+            ('соль', '10', 'г'),
+            ('соль', '1', 'по вкусу'),
+            ('яйца', '5', 'шт.'),
+        ])
+
+    def test_download_formats(self):
+        expected = {
+            'txt': 'Сахар, 2.705 - кг\n',
+            'csv': 'Сахар,2.705,кг\r\n',
+        }
+        for extension, line in expected.items():
+            with self.subTest(format=extension):
+                response = self.client.get(
+                    '/api/recipes/download_shopping_cart/',
+                    {'format': extension},
+                )
+                self.assertEqual(response.status_code, 200)
+                content = b''.join(response.streaming_content).decode()
+                self.assertIn(line, content)
+                self.assertEqual(content.count('Сахар'), 1)
+
+    @skipUnless(
+        Path(settings.SHOPPING_LIST_PDF_FONT).exists(), 'PDF font not found'
+    )
+    def test_download_pdf(self):
+        response = self.client.get(
+            '/api/recipes/download_shopping_cart/', {'format': 'pdf'}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(b''.join(response.streaming_content).startswith(
+            b'%PDF'
+        ))
+
+    @override_settings(SHOPPING_LIST_PDF_FONT='/nonexistent/font.ttf')
+    def test_missing_pdf_font_is_server_error(self):
+        self.client.raise_request_exception = False
+        with mock.patch(
+            'api.download.pdfmetrics.getRegisteredFontNames', return_value=[]
+        ):
+            response = self.client.get(
+                '/api/recipes/download_shopping_cart/', {'format': 'pdf'}
+            )
+        self.assertEqual(response.status_code, 500)
+        self.assertFalse(response.streaming)
@@ -0,0 +1,86 @@
+import base64
+import json
+
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from recipes.tests.factories import create_recipes, create_user
+from users.models import Follow
+
+
+def encode_cursor(position, reverse=0):
+    cursor = json.dumps({'p': position, 'r': reverse})
+    return base64.urlsafe_b64encode(cursor.encode()).decode()
+
+
+class KeysetCursorTests(TestCase):
+    def setUp(self):
+        self.user = create_user(1, token=True)
+        self.author = create_user(2)
+        Follow.objects.create(user=self.user, author=self.author)
+        create_recipes(self.author, 3)
+        self.client = APIClient()
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f'Token {self.user.auth_token.key}'
+        )
+
+    def test_invalid_positions_are_not_found(self):
+        urls = (
+            '/api/recipes/',
+            '/api/recipes/?ordering=trending',
+            '/api/recipes/feed/',
+            '/api/users/subscriptions/',
+        )
+        positions = (
+            ['garbage', 5],
+            ['2024-01-01T00:00:00+00:00', 'x'],
+            ['2024-01-01T00:00:00', 5],
+            [None, None],
+            [None],
+            [['nested'], {}],
+            [1, 2, 3],
+            ['x'],
+        )
+        for url in urls:
+            for position in positions:
+                with self.subTest(url=url, position=position):
+                    response = self.client.get(
+                        url, {'cursor': encode_cursor(position), 'limit': 1}
+                    )
+                    self.assertEqual(response.status_code, 404)
+            with self.subTest(url=url, cursor='not base64'):
+                response = self.client.get(url, {'cursor': '!!!'})
+                self.assertEqual(response.status_code, 404)
+
+    def test_cursor_round_trip(self):
+        response = self.client.get(
+            '/api/recipes/', {'pagination': 'cursor', 'limit': 2}
+        )
+        self.assertEqual(response.status_code, 200)
+        first_page = [recipe['id'] for recipe in response.data['results']]
+        response = self.client.get(response.data['next'])
+        self.assertEqual(response.status_code, 200)
+        second_page = [recipe['id'] for recipe in response.data['results']]
+        self.assertEqual(len(first_page + second_page), 3)
+        self.assertFalse(set(first_page) & set(second_page))
+        self.assertIsNone(response.data['next'])
+
+    def test_cursor_with_search_is_rejected(self):
+        for params in (
+            {'search': 'рецепт', 'pagination': 'cursor'},
+            {'search': 'рецепт', 'cursor': encode_cursor(
+                ['2024-01-01T00:00:00+00:00', 5]
+            )},
+        ):
+            with self.subTest(params=params):
+                response = self.client.get('/api/recipes/', params)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('pagination', response.data)
+        response = self.client.get(
+            '/api/recipes/', {'search': 'рецепт', 'limit': 2}
+        )
+        self.assertEqual(response.status_code, 200)
+        response = self.client.get(
+            '/api/recipes/', {'ordering': 'trending', 'pagination': 'cursor'}
+        )
+        self.assertEqual(response.status_code, 200)
@@ -0,0 +1,77 @@
+from django.conf import settings
+from django.core.signals import request_finished
+from django.db import close_old_connections, connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from api.profiling import METRICS, registry, to_prometheus
+from recipes.models import Cart
+from recipes.tests.factories import (create_ingredients, create_recipe,
+                                     create_user)
+
+MIDDLEWARE = ['api.profiling.ProfilingMiddleware', *settings.MIDDLEWARE]
+
+
+@override_settings(MIDDLEWARE=MIDDLEWARE)
+class ProfilingMiddlewareTests(TestCase):
+    def setUp(self):
+        registry.reset()
+        self.user = create_user(1, token=True)
+        self.client = APIClient()
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f'Token {self.user.auth_token.key}'
+        )
+
+    def get_sample(self, endpoint):
+        return registry.snapshot().get(endpoint)
+
+    def test_streaming_response_is_profiled_until_exhausted(self):
+        recipe = create_recipe(self.user, create_ingredients(3))
+        Cart.objects.create(user=self.user, recipe=recipe)
+        endpoint = 'RecipeViewSet.download_shopping_cart'
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                '/api/recipes/download_shopping_cart/'
+            )
+            self.assertTrue(response.streaming)
+            self.assertIsNone(self.get_sample(endpoint))
+            content = b''.join(response.streaming_content)
+        self.assertIn('ингредиент 2'.encode(), content)
+        sample = self.get_sample(endpoint)
+        self.assertEqual(sample['queries']['count'], 1)
+        self.assertEqual(sample['queries']['sum'], len(queries))
+        self.assertGreater(sample['sql_duration']['sum'], 0)
+
+    def test_closed_streaming_response_is_recorded(self):
+        response = self.client.get('/api/recipes/download_shopping_cart/')
+        request_finished.disconnect(close_old_connections)
+        try:
+            response.close()
+        finally:
+            request_finished.connect(close_old_connections)
+        sample = self.get_sample('RecipeViewSet.download_shopping_cart')
+        self.assertEqual(sample['duration']['count'], 1)
+
+    def test_regular_response_has_server_timing(self):
+        response = self.client.get('/api/tags/')
+        self.assertIn('sql;dur=', response['Server-Timing'])
+        self.assertEqual(
+            self.get_sample('TagViewSet.list')['duration']['count'], 1
+        )
+
+
+class PrometheusFormatTests(SimpleTestCase):
+    def test_label_values_are_escaped(self):
+        histogram = {'buckets': {'+Inf': 1}, 'sum': 0.5, 'count': 1}
+        report = {
+            'endpoints': {'a\\b"c\nd': {name: histogram for name in METRICS}},
+            'caches': {'de"fault': {'hits': 2, 'misses': 0}},
+        }
+        lines = to_prometheus(report).splitlines()
+        self.assertIn(
+            'foodgram_request_duration_seconds_count'
+            '{endpoint="a\\\\b\\"c\\nd"} 1',
+            lines,
+        )
+        self.assertIn('foodgram_cache_hits_total{cache="de\\"fault"} 2', lines)
@@ -0,0 +1,103 @@
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from recipes.models import Cart, Favorite
+from recipes.tests.factories import (create_ingredients, create_recipes,
+                                     create_tags, create_user)
+from users.models import Follow
+
+
+class QueryCountTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = create_user(1, token=True)
+        self.client = APIClient()
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f'Token {self.user.auth_token.key}'
+        )
+
+    def assertQueryCount(self, url, params, expected):
+        cache.clear()
+        with self.assertNumQueries(expected):
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+
+class RecipeListQueryCountTests(QueryCountTestCase):
+    def setUp(self):
+        super().setUp()
+        tags = create_tags(3)
+        ingredients = create_ingredients(4)
+        for number in range(2, 5):
+            recipes = create_recipes(create_user(number), 8, ingredients, tags)
+            for recipe in recipes[:3]:
+                Favorite.objects.create(user=self.user, recipe=recipe)
+                Cart.objects.create(user=self.user, recipe=recipe)
+
+    def test_query_count_does_not_depend_on_page_size(self):
+        for limit in (6, 20):
+            with self.subTest(limit=limit):
+                response = self.assertQueryCount(
+                    '/api/recipes/', {'limit': limit}, 11
+                )
+                self.assertEqual(len(response.data['results']), limit)
+
+    def test_warm_cache_and_not_modified_skip_recipe_queries(self):
+        response = self.assertQueryCount('/api/recipes/', {'limit': 6}, 11)
+        with self.assertNumQueries(1):
+            self.assertEqual(
+                self.client.get('/api/recipes/', {'limit': 6}).status_code,
+                200
+            )
+        with self.assertNumQueries(1):
+            response = self.client.get(
+                '/api/recipes/', {'limit': 6},
+                HTTP_IF_NONE_MATCH=response['ETag']
+            )
+        self.assertEqual(response.status_code, 304)
+
+    def test_recipe_change_invalidates_list_etag(self):
+        response = self.client.get('/api/recipes/')
+        recipe = Favorite.objects.first().recipe
+        with self.captureOnCommitCallbacks(execute=True):
+            recipe.save()
+        response = self.client.get(
+            '/api/recipes/', HTTP_IF_NONE_MATCH=response['ETag']
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_retrieve_validator_uses_recipe_row(self):
+        url = f'/api/recipes/{Favorite.objects.first().recipe_id}/'
+        response = self.client.get(url)
+        with self.assertNumQueries(2):
+            response = self.client.get(
+                url, HTTP_IF_NONE_MATCH=response['ETag']
+            )
+        self.assertEqual(response.status_code, 304)
+
+
+class SubscriptionsQueryCountTests(QueryCountTestCase):
+    def setUp(self):
+        super().setUp()
+        for number in range(2, 10):
+            author = create_user(number)
+            create_recipes(author, 5)
+            Follow.objects.create(user=self.user, author=author)
+
+    def test_query_count_does_not_depend_on_page_or_recipes_limit(self):
+        for limit in (2, 6):
+            for recipes_limit in (1, 4):
+                with self.subTest(limit=limit, recipes_limit=recipes_limit):
+                    response = self.assertQueryCount(
+                        '/api/users/subscriptions/',
+                        {'limit': limit, 'recipes_limit': recipes_limit},
+                        4,
+                    )
+                    results = response.data['results']
+                    self.assertEqual(len(results), limit)
+                    for author in results:
+                        self.assertEqual(
+                            len(author['recipes']), recipes_limit
+                        )
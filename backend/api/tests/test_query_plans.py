@@ -0,0 +1,82 @@
+from itertools import combinations
+from types import SimpleNamespace
+from unittest import skipUnless
+
+from django.db import connection
+from django.http import QueryDict
+from django.test import TestCase
+
+from api.filters import RecipeFilter
+from recipes.models import Cart, Favorite, Recipe
+from recipes.tests.factories import create_recipes, create_tags, create_user
+
+
+@skipUnless(connection.vendor == 'postgresql', 'EXPLAIN plans need Postgres')
+class RecipeFilterPlanTests(TestCase):
+    def setUp(self):
+        self.user = create_user(1)
+        tags = create_tags(3)
+        self.tags = tags[:2]
+        self.recipes = create_recipes(create_user(2), 100, tags=tags[2:])
+        Recipe.tags.through.objects.bulk_create(
+            Recipe.tags.through(recipe=recipe, tag=tag)
+            for recipe, tag in zip(self.recipes, self.tags)
+        )
+        fans = [create_user(number) for number in range(3, 8)]
+        for model in (Favorite, Cart):
+            model.objects.create(user=self.user, recipe=self.recipes[0])
+            model.objects.bulk_create(
+                model(user=fan, recipe=recipe)
+                for fan in fans for recipe in self.recipes
+            )
+        self.params = {
+            'tags': [tag.slug for tag in self.tags],
+            'author': [str(self.recipes[0].author_id)],
+            'is_favorited': ['1'],
+            'is_in_shopping_cart': ['1'],
+        }
+        with connection.cursor() as cursor:
+            for model in (Recipe, Recipe.tags.through, Favorite, Cart):
+                cursor.execute(f'ANALYZE {model._meta.db_table}')
+
+    def explain(self, queryset):
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+        return queryset.explain()
+
+    def explain_filters(self, *names):
+        data = QueryDict(mutable=True)
+        for name in names:
+            data.setlist(name, self.params[name])
+        filterset = RecipeFilter(
+            data, queryset=Recipe.objects.all(),
+            request=SimpleNamespace(user=self.user),
+        )
+        self.assertTrue(filterset.is_valid(), filterset.errors)
+        return self.explain(filterset.qs.with_user_flags(self.user)[:6])
+
+    def test_filters_use_indexes(self):
+        cases = {
+            'tags': 'recipe_tags_tag_recipe_idx',
+            'is_favorited': 'unique_item_in_favorite',
+            'is_in_shopping_cart': 'unique_item_in_cart',
+        }
+        for name, index in cases.items():
+            with self.subTest(filter=name):
+                self.assertIn(index, self.explain_filters(name))
+
+    def test_recipe_lookups_use_indexes(self):
+        cases = {
+            Favorite: 'favorite_recipe_user_idx',
+            Cart: 'cart_recipe_user_idx',
+        }
+        for model, index in cases.items():
+            with self.subTest(model=model.__name__):
+                queryset = model.objects.filter(recipe=self.recipes[0])
+                self.assertIn(index, self.explain(queryset.values('user')))
+
+    def test_filter_combinations_avoid_seq_scans(self):
+        for size in range(len(self.params) + 1):
+            for names in combinations(self.params, size):
+                with self.subTest(filters=names):
+                    self.assertNotIn('Seq Scan', self.explain_filters(*names))
@@ -0,0 +1,72 @@
+import base64
+import io
+import os
+import tracemalloc
+
+from django.test import SimpleTestCase
+from PIL import Image
+from rest_framework.exceptions import ValidationError
+
+from api.uploads import decode_data_uri
+
+
+def make_png(size):
+    image = Image.frombytes('RGB', size, os.urandom(size[0] * size[1] * 3))
+    buffer = io.BytesIO()
+    image.save(buffer, 'PNG', compress_level=0)
+    return buffer.getvalue()
+
+
+class DecodeImageTests(SimpleTestCase):
+    def setUp(self):
+        self.png = make_png((20, 10))
+        self.encoded = base64.b64encode(self.png).decode()
+
+    def assertDecoded(self, data, content):
+        upload = decode_data_uri(data)
+        try:
+            self.assertEqual(upload.read(), content)
+            self.assertEqual(upload.size, len(content))
+            self.assertTrue(upload.name.endswith('.png'))
+        finally:
+            upload.close()
+
+    def test_data_uri(self):
+        self.assertDecoded(f'data:image/png;base64,{self.encoded}', self.png)
+
+    def test_raw_base64_is_still_accepted(self):
+        self.assertDecoded(self.encoded, self.png)
+
+    def test_line_wrapped_base64(self):
+        wrapped = base64.encodebytes(self.png).decode()
+        self.assertDecoded(f'data:image/png;base64,{wrapped}', self.png)
+        self.assertDecoded(wrapped, self.png)
+
+    def test_invalid_payloads(self):
+        for data in (
+            'data:image/png,plain',
+            'data:image/png;base64,!!!!',
+            self.encoded[:-1],
+            base64.b64encode(b'not an image').decode(),
+            '',
+        ):
+            with self.subTest(data=data[:30]):
+                with self.assertRaises(ValidationError):
+                    decode_data_uri(data)
+
+    def test_large_payload_has_bounded_peak_memory(self):
+        png = make_png((1200, 1000))
+        data = 'data:image/png;base64,' + base64.b64encode(png).decode()
+        self.assertGreater(len(data), 4 * 1024 * 1024)
+        tracemalloc.start()
+        try:
+            upload = decode_data_uri(data)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        try:
+            self.assertEqual(upload.size, len(png))
+            self.assertEqual(upload.read(), png)
+        finally:
+            upload.close()
+        self.assertLess(peak, 1024 * 1024)
@@ -0,0 +1,119 @@
+import base64
+import binascii
+import io
+import re
+import uuid
+
+import filetype
+from django.conf import settings
+from django.core.files.uploadedfile import (InMemoryUploadedFile,
+                                            TemporaryUploadedFile)
+from PIL import Image
+from rest_framework.exceptions import ValidationError
+
+CHUNK_SIZE = 64 * 1024
+IMAGE_EXTENSIONS = ('jpg', 'png', 'gif', 'webp')
+WHITESPACE = re.compile(r'\s+')
+
+
+def get_decoded_size(data, start):
+    end = len(data)
+    while end > start and data[end - 1].isspace():
+        end -= 1
+    length = end - start - sum(
+        data.count(character, start, end) for character in ' \t\r\n'
+    )
+    return length * 3 // 4 - data.count('=', max(start, end - 2), end)
+
+
+def iter_base64_chunks(data, start):
+    rest = ''
+    for offset in range(start, len(data), CHUNK_SIZE):
+        rest += WHITESPACE.sub('', data[offset:offset + CHUNK_SIZE])
+        end = len(rest) - len(rest) % 4
+        if end:
+            yield base64.b64decode(rest[:end], validate=True)
+            rest = rest[end:]
+    if rest:
+        raise binascii.Error('Incorrect padding')
+
+
+def check_size(size):
+    if size > settings.RECIPE_IMAGE_MAX_SIZE:
+        raise ValidationError(
+            'Размер изображения не должен превышать '
+            f'{settings.RECIPE_IMAGE_MAX_SIZE} байт.'
+        )
+
+
+def check_dimensions(file):
+    position = file.tell()
+    file.seek(0)
+    try:
+        width, height = Image.open(file).size
+    except (OSError, Image.DecompressionBombError):
+        return False
+    finally:
+        file.seek(position)
+    max_dimension = settings.RECIPE_IMAGE_MAX_DIMENSION
+    if width > max_dimension or height > max_dimension:
+        raise ValidationError(
+            'Ширина и высота изображения не должны превышать '
+            f'{max_dimension} пикселей.'
+        )
+    return True
+
+
+def open_upload(size, name, content_type):
+    if size <= settings.FILE_UPLOAD_MAX_MEMORY_SIZE:
+        return InMemoryUploadedFile(
+            io.BytesIO(), None, name, content_type, size, None
+        )
+    return TemporaryUploadedFile(name, content_type, size, None)
+
+
+def decode_data_uri(data):
+    header, separator, _ = data[:256].partition(';base64,')
+    if not separator and data.startswith('data:'):
+        raise ValidationError('Изображение должно быть передано в base64.')
+    start = len(header) + len(separator) if separator else 0
+    size = get_decoded_size(data, start)
+    check_size(size)
+    head = b''
+    upload = None
+    try:
+        for chunk in iter_base64_chunks(data, start):
+            if upload is None:
+                head = chunk
+                extension = filetype.guess_extension(head)
+                if extension == 'jpeg':
+                    extension = 'jpg'
+                if extension not in IMAGE_EXTENSIONS:
+                    raise ValidationError('Неподдерживаемый тип изображения.')
+                upload = open_upload(
+                    size, f'{uuid.uuid4()}.{extension}',
+                    filetype.guess_mime(head)
+                )
+                dimensions_checked = check_dimensions(io.BytesIO(head))
+            upload.write(chunk)
+    except (binascii.Error, ValueError):
+        if upload is not None:
+            upload.close()
+        raise ValidationError('Некорректная строка base64.')
+    except ValidationError:
+        if upload is not None:
+            upload.close()
+        raise
+    if upload is None:
+        raise ValidationError('Изображение не может быть пустым.')
+    upload.size = upload.tell()
+    upload.seek(0)
+    if not dimensions_checked:
+        check_dimensions(upload)
+    return upload
+
+
+def check_upload(upload):
+    check_size(upload.size)
+    check_dimensions(upload)
+    return upload
@@ -1,8 +1,8 @@
 from django.urls import include, path, re_path
 from rest_framework import routers
 
-from api.views import (CustomUserViewSet, IngredintViewSet, RecipeViewSet,
-                       TagViewSet)
+from api.views import (CustomUserViewSet, IngredintViewSet,
+                       ProfilingReportView, RecipeViewSet, TagViewSet)
 
 app_name = 'api'
 
@@ -13,6 +13,7 @@ api_router_v1.register('ingredients', IngredintViewSet, basename='ingredient')
 api_router_v1.register(r'users', CustomUserViewSet, basename='user')
 
 urlpatterns = [
+    path('profiling/', ProfilingReportView.as_view(), name='profiling'),
     path('', include(api_router_v1.urls)),
     re_path(r'^auth/', include('djoser.urls.authtoken')),
 ]
@@ -1,34 +1,66 @@
 from django.contrib.auth import get_user_model
-from django.db.models import Sum
-from django.http import HttpResponse
+from django.contrib.auth.models import AnonymousUser
+from django.db.models import BooleanField, F, Value
+from django.http import Http404, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
 from djoser.views import UserViewSet
 from rest_framework import status, viewsets
 from rest_framework.decorators import action
-from rest_framework.filters import SearchFilter
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.parsers import FormParser
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
+from rest_framework.views import APIView
 
-from api.download import download_card
-from api.filters import RecipeFilter
-from api.pagination import MyPageNumberPagination
+from api.download import DOWNLOAD_FORMATS, get_shopping_list
+from api.filters import IngredientSearchFilter, RecipeFilter
+from api.mixins import (ConditionalGetMixin, RecipeListCacheMixin,
+                        ReferenceCacheMixin)
+from api.pagination import (FeedPagination, MyPageNumberPagination,
+                            OptionalKeysetPagination)
+from api.parsers import RecipeJSONParser, RecipeMultiPartParser
 from api.permissions import IsSuperUserOrOwnerOrReadOnly
+from api.profiling import registry
+from api.renderers import (CSVRenderer, PDFRenderer, PlainTextRenderer,
+                           PrometheusRenderer, ShoppingListNegotiation)
 from api.serializers import (AddRecipeSerializer, AddToFavoriteSerializer,
                              AddToShoppingCartSerializer,
-                             CreateFollowSerializer, CustomUserSerializer,
-                             FollowSerializer, IngredientSerializer,
-                             RecipeSerializer, TagSerializer)
+                             BulkRecipesSerializer, CreateFollowSerializer,
+                             CustomUserSerializer, FollowSerializer,
+                             IngredientSerializer, PantrySerializer,
+                             RecipeSerializer, ShortRecipeSerializer,
+                             TagSerializer, get_recipes_limit)
+from recipes.bulk import bulk_add, bulk_remove
+from recipes.cache import (RECIPES_VERSION_KEY, USERS_VERSION_KEY,
+                           get_cache_stats, get_user_state_version,
+                           get_version, ingredient_cache, tag_cache)
+from recipes.feed import filter_feed, get_feed, select_page_ids
 from recipes.models import Cart, Favorite, Ingredient, Recipe, Tag
+from recipes.pantry import find_pantry_recipes
+from recipes.similarity import get_similar_recipe_ids
+from recipes.trending import TRENDING_ORDERING, TRENDING_VERSION_KEY
 from users.models import Follow
 
 User = get_user_model()
 
 
-class CustomUserViewSet(UserViewSet):
+class CustomUserViewSet(ConditionalGetMixin, UserViewSet):
     serializer_class = CustomUserSerializer
     queryset = User.objects.all()
-    pagination_class = MyPageNumberPagination
+    pagination_class = OptionalKeysetPagination
+
+    @property
+    def keyset_ordering(self):
+        if self.action == 'subscriptions':
+            return ('-follow_id',)
+        return ('id',)
+
+    def get_validators(self, request):
+        return (
+            get_version(USERS_VERSION_KEY),
+            get_user_state_version(request.user),
+        ), None
 
     @action(
         methods=['post'],
@@ -74,9 +106,20 @@ class CustomUserViewSet(UserViewSet):
         permission_classes=[IsAuthenticated],
     )
     def subscriptions(self, request):
+        limit = get_recipes_limit(request)
         subs = self.paginate_queryset(
-            User.objects.filter(following__user=request.user)
+            User.objects.filter(following__user=request.user).annotate(
+                follow_id=F('following__id'),
+                is_subscribed=Value(True, output_field=BooleanField()),
+            ).order_by('-follow_id')
         )
+        latest_recipes = {author.pk: [] for author in subs}
+        for recipe in Recipe.objects.latest_by_author(
+            latest_recipes, limit
+        ):
+            latest_recipes[recipe.author_id].append(recipe)
+        for author in subs:
+            author.latest_recipes = latest_recipes[author.pk]
         serializer = FollowSerializer(
             subs,
             many=True,
@@ -85,34 +128,204 @@ class CustomUserViewSet(UserViewSet):
         return self.get_paginated_response(serializer.data)
 
 
-class RecipeViewSet(viewsets.ModelViewSet):
+class RecipeViewSet(ConditionalGetMixin, RecipeListCacheMixin,
+                    viewsets.ModelViewSet):
     queryset = Recipe.objects.all()
     serializer_class = RecipeSerializer
     filter_backends = (DjangoFilterBackend,)
     filterset_class = RecipeFilter
     permission_classes = (IsSuperUserOrOwnerOrReadOnly,)
-    pagination_class = MyPageNumberPagination
+    pagination_class = OptionalKeysetPagination
+    parser_classes = (RecipeJSONParser, FormParser, RecipeMultiPartParser)
+
+    @property
+    def keyset_ordering(self):
+        if (
+            self.action == 'list'
+            and self.request.query_params.get('ordering') == 'trending'
+        ):
+            return TRENDING_ORDERING
+        return ('-pub_date', '-id')
+
+    def get_ordering_version(self):
+        if self.keyset_ordering == TRENDING_ORDERING:
+            return get_version(TRENDING_VERSION_KEY)
+        return None
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action in ('retrieve', 'list', 'feed', 'pantry'):
+            user = self.request.user
+            if self.shared_list:
+                user = AnonymousUser()
+            queryset = queryset.with_related(user).with_user_flags(user)
+        return queryset
+
+    def get_validators(self, request):
+        etag_parts = (
+            tag_cache.version,
+            ingredient_cache.version,
+            get_version(USERS_VERSION_KEY),
+            self.get_ordering_version(),
+            get_user_state_version(request.user),
+        )
+        if self.action != 'retrieve':
+            return (get_version(RECIPES_VERSION_KEY), *etag_parts), None
+        try:
+            pk = int(self.kwargs['pk'])
+        except ValueError:
+            return None, None
+        modified = Recipe.objects.filter(pk=pk).values_list(
+            'modified', flat=True
+        ).first()
+        if modified is None:
+            return None, None
+        last_modified = None
+        if not request.user.is_authenticated:
+            last_modified = modified
+        return (modified, *etag_parts), last_modified
 
     def perform_create(self, serializer):
         serializer.save(author=self.request.user)
 
     def get_serializer_class(self):
-        if self.action in ('retrieve', 'list'):
+        if self.action in ('retrieve', 'list', 'feed', 'pantry'):
             return RecipeSerializer
         return AddRecipeSerializer
 
     @action(
         detail=False,
         methods=['get'],
-        permission_classes=[IsAuthenticated]
+        permission_classes=[IsAuthenticated],
+        pagination_class=FeedPagination,
+    )
+    def feed(self, request):
+        user_id = request.user.pk
+        paginator = self.paginator
+        page_ids = select_page_ids(
+            get_feed(user_id),
+            paginator.decode_cursor(request),
+            paginator.get_page_size(request),
+        )
+        queryset = self.get_queryset()
+        if page_ids is None:
+            queryset = filter_feed(queryset, user_id)
+        else:
+            queryset = queryset.filter(pk__in=page_ids)
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    @action(
+        detail=False,
+        methods=['get'],
+        pagination_class=MyPageNumberPagination,
+    )
+    def pantry(self, request):
+        query = {'ingredients': request.query_params.getlist('ingredients')}
+        if 'max_missing' in request.query_params:
+            query['max_missing'] = request.query_params['max_missing']
+        serializer = PantrySerializer(data=query)
+        serializer.is_valid(raise_exception=True)
+        page = self.paginate_queryset(
+            find_pantry_recipes(**serializer.validated_data)
+        )
+        recipes = self.get_queryset().in_bulk(
+            [recipe_id for recipe_id, _, _ in page]
+        )
+        matches = [
+            (recipes[recipe_id], missing)
+            for recipe_id, _, missing in page if recipe_id in recipes
+        ]
+        serializer = self.get_serializer(
+            [recipe for recipe, _ in matches], many=True
+        )
+        return self.get_paginated_response([
+            {**data, 'missing_ingredients': missing}
+            for data, (_, missing) in zip(serializer.data, matches)
+        ])
+
+    @action(detail=True, methods=['get'])
+    def similar(self, request, pk):
+        try:
+            similar_ids = get_similar_recipe_ids(int(pk))
+        except ValueError:
+            raise Http404
+        if similar_ids is None:
+            get_object_or_404(Recipe, pk=pk)
+            similar_ids = []
+        recipes = Recipe.objects.defer('search_vector').in_bulk(similar_ids)
+        serializer = ShortRecipeSerializer(
+            [recipes[pk] for pk in similar_ids if pk in recipes],
+            many=True,
+            context=self.get_serializer_context(),
+        )
+        return Response(serializer.data)
+
+    @action(
+        detail=False,
+        methods=['get'],
+        permission_classes=[IsAuthenticated],
+        renderer_classes=[PlainTextRenderer, CSVRenderer, PDFRenderer],
+        content_negotiation_class=ShoppingListNegotiation
     )
     def download_shopping_cart(self, request):
-        cart = Cart.objects.filter(user=request.user).values(
-            'recipe__ingredients_recipe__ingredient__name',
-            'recipe__ingredients_recipe__ingredient__measurement_unit'
-        ).annotate(total_amount=Sum('recipe__ingredients_recipe__amount'))
-        shopping_list = download_card(cart)
-        return HttpResponse(shopping_list, content_type='text/plain')
+        renderer = request.accepted_renderer
+        shopping_list = DOWNLOAD_FORMATS[renderer.format](
+            get_shopping_list(request.user)
+        )
+        content_type = renderer.media_type
+        if renderer.charset:
+            content_type = f'{content_type}; charset={renderer.charset}'
+        response = StreamingHttpResponse(
+            shopping_list,
+            content_type=content_type
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="shopping_list.{renderer.format}"'
+        )
+        return response
+
+    def bulk_change(self, request, model, change):
+        serializer = BulkRecipesSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        results = change(
+            model, request.user, serializer.validated_data['recipes']
+        )
+        return Response({
+            'results': [
+                {'id': pk, 'status': result}
+                for pk, result in results.items()
+            ]
+        })
+
+    @action(
+        detail=False,
+        methods=['post'],
+        url_path='favorite',
+        url_name='favorite-bulk',
+        permission_classes=[IsAuthenticated]
+    )
+    def bulk_favorite(self, request):
+        return self.bulk_change(request, Favorite, bulk_add)
+
+    @bulk_favorite.mapping.delete
+    def bulk_unfavorite(self, request):
+        return self.bulk_change(request, Favorite, bulk_remove)
+
+    @action(
+        detail=False,
+        methods=['post'],
+        url_path='shopping_cart',
+        url_name='shopping-cart-bulk',
+        permission_classes=[IsAuthenticated]
+    )
+    def bulk_shopping_cart(self, request):
+        return self.bulk_change(request, Cart, bulk_add)
+
+    @bulk_shopping_cart.mapping.delete
+    def bulk_delete_from_shopping_cart(self, request):
+        return self.bulk_change(request, Cart, bulk_remove)
 
     @action(
         detail=True,
@@ -195,15 +408,40 @@ class RecipeViewSet(viewsets.ModelViewSet):
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
-class TagViewSet(viewsets.ReadOnlyModelViewSet):
+class TagViewSet(ConditionalGetMixin, ReferenceCacheMixin,
+                 viewsets.ReadOnlyModelViewSet):
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
     pagination_class = None
+    reference_cache = tag_cache
+
+    def get_validators(self, request):
+        return (tag_cache.version,), None
 
 
-class IngredintViewSet(viewsets.ReadOnlyModelViewSet):
+class IngredintViewSet(ConditionalGetMixin, ReferenceCacheMixin,
+                       viewsets.ReadOnlyModelViewSet):
     queryset = Ingredient.objects.all()
     serializer_class = IngredientSerializer
     pagination_class = None
-    filter_backends = (SearchFilter,)
-    search_fields = ('^name',)
+    filter_backends = (IngredientSearchFilter,)
+    reference_cache = ingredient_cache
+    reference_filter_params = (IngredientSearchFilter.search_param,)
+
+    def get_validators(self, request):
+        return (ingredient_cache.version,), None
+
+
+class ProfilingReportView(APIView):
+    permission_classes = (IsAdminUser,)
+    renderer_classes = (JSONRenderer, PrometheusRenderer)
+
+    def get(self, request):
+        return Response({
+            'endpoints': registry.snapshot(),
+            'caches': get_cache_stats(),
+        })
+
+    def delete(self, request):
+        registry.reset()
+        return Response(status=status.HTTP_204_NO_CONTENT)
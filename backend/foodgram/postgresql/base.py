@@ -0,0 +1,63 @@
+from functools import partial
+
+from django.db.backends.postgresql import base
+
+from foodgram.postgresql.pool import get_pool, is_usable
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    health_check_done = False
+
+    def get_pool(self, connect=None):
+        options = self.settings_dict.get('POOL')
+        if not options:
+            return None
+        return get_pool(
+            (self.alias, self.settings_dict['NAME']), connect, **options
+        )
+
+    @property
+    def pool(self):
+        return self.get_pool()
+
+    @property
+    def health_check_enabled(self):
+        return self.settings_dict.get('CONN_HEALTH_CHECKS', False)
+
+    def get_new_connection(self, conn_params):
+        pool = self.get_pool(partial(super().get_new_connection, conn_params))
+        if pool is None:
+            return super().get_new_connection(conn_params)
+        connection = pool.get(is_usable if self.health_check_enabled else None)
+        self.isolation_level = self.settings_dict['OPTIONS'].get(
+            'isolation_level', connection.isolation_level
+        )
+        return connection
+
+    def _close(self):
+        pool = self.pool
+        if pool is None or self.connection is None:
+            return super()._close()
+        with self.wrap_database_errors:
+            pool.put(self.connection, discard=self.errors_occurred)
+
+    def connect(self):
+        self.health_check_done = True
+        super().connect()
+
+    def close_if_unusable_or_obsolete(self):
+        super().close_if_unusable_or_obsolete()
+        self.health_check_done = False
+
+    def ensure_connection(self):
+        if (
+            self.connection is not None
+            and self.health_check_enabled
+            and not self.health_check_done
+            and not self.in_atomic_block
+        ):
+            if not self.is_usable():
+                self.errors_occurred = True
+                self.close()
+            self.health_check_done = True
+        super().ensure_connection()
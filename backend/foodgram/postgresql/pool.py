@@ -0,0 +1,77 @@
+import os
+import threading
+
+from psycopg2 import Error, OperationalError, pool
+
+pools = {}
+pools_lock = threading.Lock()
+
+
+def is_usable(connection):
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+    except Error:
+        return False
+    return True
+
+
+class ConnectionPool(pool.ThreadedConnectionPool):
+    def __init__(self, connect, max_size, timeout):
+        self.connect = connect
+        self.fresh = set()
+        super().__init__(0, max_size)
+        # Idle connections are kept up to max_size but opened lazily.
+        self.minconn = max_size
+        self.slots = threading.BoundedSemaphore(max_size)
+        self.timeout = timeout
+
+    def _connect(self, key=None):
+        connection = self.connect()
+        self.fresh.add(id(connection))
+        self._used[key] = connection
+        self._rused[id(connection)] = key
+        return connection
+
+    def get(self, check=None):
+        if not self.slots.acquire(timeout=self.timeout):
+            raise OperationalError(
+                'Нет свободных соединений с базой данных в пуле.'
+            )
+        try:
+            while True:
+                connection = self.getconn()
+                with self._lock:
+                    fresh = id(connection) in self.fresh
+                    self.fresh.discard(id(connection))
+                if not connection.closed and (
+                    fresh or check is None or check(connection)
+                ):
+                    return connection
+                self.putconn(connection, close=True)
+        except BaseException:
+            self.slots.release()
+            raise
+
+    def put(self, connection, discard=False):
+        try:
+            self.putconn(connection, close=discard)
+        finally:
+            self.slots.release()
+
+    def clear(self):
+        with self._lock:
+            while self._pool:
+                self._pool.pop().close()
+
+
+def get_pool(key, connect=None, max_size=10, timeout=5):
+    key = (*key, max_size, timeout)
+    with pools_lock:
+        if key not in pools and connect is not None:
+            pools[key] = ConnectionPool(connect, max_size, timeout)
+        return pools.get(key)
+
+
+# Connections inherited from the parent process belong to its sockets.
+os.register_at_fork(after_in_child=pools.clear)
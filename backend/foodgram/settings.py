@@ -47,6 +47,13 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+PROFILING_ENABLED = os.getenv('PROFILING_ENABLED', 'False') == 'True'
+PROFILING_DUPLICATE_QUERY_THRESHOLD = int(
+    os.getenv('PROFILING_DUPLICATE_QUERY_THRESHOLD', 5)
+)
+if PROFILING_ENABLED:
+    MIDDLEWARE.insert(0, 'api.profiling.ProfilingMiddleware')
+
 ROOT_URLCONF = 'foodgram.urls'
 
 TEMPLATES = [
@@ -67,17 +74,55 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'foodgram.wsgi.application'
 
+DB_POOL = os.getenv('DB_POOL', 'False') == 'True'
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
+        'ENGINE': 'foodgram.postgresql',
         'NAME': os.getenv('POSTGRES_DB', 'django'),
         'USER': os.getenv('POSTGRES_USER', 'django'),
         'PASSWORD': os.getenv('POSTGRES_PASSWORD', ''),
         'HOST': os.getenv('DB_HOST', ''),
-        'PORT': os.getenv('DB_PORT', 5432)
+        'PORT': os.getenv('DB_PORT', 5432),
+        'CONN_MAX_AGE': int(
+            os.getenv('DB_CONN_MAX_AGE', 0 if DB_POOL else 60)
+        ),
+        'CONN_HEALTH_CHECKS': (
+            os.getenv('DB_CONN_HEALTH_CHECKS', 'True') == 'True'
+        ),
+        'POOL': {
+            'max_size': int(os.getenv('DB_POOL_MAX_SIZE', 10)),
+            'timeout': float(os.getenv('DB_POOL_TIMEOUT', 5)),
+        } if DB_POOL else None,
     }
 }
 
+if os.getenv('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django_redis.cache.RedisCache',
+            'LOCATION': os.getenv('REDIS_URL'),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+REFERENCE_CACHE_TIMEOUT = int(os.getenv('REFERENCE_CACHE_TIMEOUT', 86400))
+RECIPE_LIST_CACHE_TIMEOUT = int(os.getenv('RECIPE_LIST_CACHE_TIMEOUT', 300))
+FEED_CACHE_SIZE = int(os.getenv('FEED_CACHE_SIZE', 300))
+FEED_CACHE_TIMEOUT = int(os.getenv('FEED_CACHE_TIMEOUT', 3600))
+TRENDING_WINDOW_DAYS = float(os.getenv('TRENDING_WINDOW_DAYS', 7))
+TRENDING_HALF_LIFE_HOURS = float(os.getenv('TRENDING_HALF_LIFE_HOURS', 24))
+SIMILAR_RECIPES_COUNT = int(os.getenv('SIMILAR_RECIPES_COUNT', 10))
+SIMILAR_RECIPES_CHUNK_SIZE = int(os.getenv('SIMILAR_RECIPES_CHUNK_SIZE', 256))
+SIMILAR_RECIPES_MAX_PRODUCTS = int(
+    os.getenv('SIMILAR_RECIPES_MAX_PRODUCTS', 1000000)
+)
+
 
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
@@ -121,6 +166,24 @@ STATIC_ROOT = BASE_DIR / 'collected_static'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+RECIPE_IMAGE_WIDTHS = tuple(
+    int(width)
+    for width in os.getenv('RECIPE_IMAGE_WIDTHS', '320 640 960').split()
+)
+RECIPE_IMAGE_FORMATS = tuple(
+    os.getenv('RECIPE_IMAGE_FORMATS', 'webp jpeg').split()
+)
+
+RECIPE_IMAGE_MAX_SIZE = int(
+    os.getenv('RECIPE_IMAGE_MAX_SIZE', 10 * 1024 * 1024)
+)
+RECIPE_IMAGE_MAX_DIMENSION = int(
+    os.getenv('RECIPE_IMAGE_MAX_DIMENSION', 8000)
+)
+
+BACKGROUND_TASKS_ASYNC = os.getenv('BACKGROUND_TASKS_ASYNC', 'True') == 'True'
+BACKGROUND_WORKERS = int(os.getenv('BACKGROUND_WORKERS', 2))
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/3.2/ref/settings/#default-auto-field
 
@@ -140,6 +203,14 @@ REST_FRAMEWORK = {
     'SEARCH_PARAM': 'name',
 }
 
+SHOPPING_LIST_PDF_FONT = os.getenv(
+    'SHOPPING_LIST_PDF_FONT',
+    '/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf'
+)
+
+INGREDIENT_SEARCH_BACKEND = os.getenv('INGREDIENT_SEARCH_BACKEND', 'memory')
+INGREDIENT_SEARCH_LIMIT = int(os.getenv('INGREDIENT_SEARCH_LIMIT', 30))
+
 DJOSER = {
     'LOGIN_FIELD': 'email',
     'HIDE_USERS': False,
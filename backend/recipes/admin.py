@@ -1,7 +1,7 @@
 from django.contrib import admin
 
 from recipes.models import (Cart, Favorite, Ingredient, Recipe,
-                            RecipeIngredient, Tag)
+                            RecipeIngredient, ShoppingListItem, Tag)
 
 
 class IngredientsInline(admin.TabularInline):
@@ -16,11 +16,14 @@ class RecipeAdmin(admin.ModelAdmin):
         IngredientsInline,
     ]
     list_filter = ('name', 'author', 'tags')
-    list_display = ('name', 'author', 'count_favorites')
+    list_display = ('name', 'author', 'count_favorites', 'trending_score')
 
-    @admin.display(description='Подсчет избранных рецептов')
+    @admin.display(
+        description='Подсчет избранных рецептов',
+        ordering='favorites_count'
+    )
     def count_favorites(self, obj):
-        return obj.favorites.count()
+        return obj.favorites_count
 
 
 class IngredientsAdmin(admin.ModelAdmin):
@@ -47,9 +50,15 @@ class FavoriteAdmin(admin.ModelAdmin):
     search_fields = ('user', )
 
 
+class ShoppingListItemAdmin(admin.ModelAdmin):
+    list_display = ('user', 'ingredient', 'amount')
+    search_fields = ('user__email', 'ingredient__name')
+
+
 admin.site.register(Recipe, RecipeAdmin)
 admin.site.register(Tag, TagAdmin)
 admin.site.register(Ingredient, IngredientsAdmin)
 admin.site.register(RecipeIngredient, RecipeIngredientAdmin)
 admin.site.register(Cart, CartAdmin)
 admin.site.register(Favorite, FavoriteAdmin)
+admin.site.register(ShoppingListItem, ShoppingListItemAdmin)
@@ -0,0 +1,86 @@
+from django.db import connection, transaction
+from django.utils import timezone
+
+from recipes import shopping_list
+from recipes.cache import bump_user_state_version
+from recipes.counters import increment
+from recipes.models import Cart, Favorite, Recipe
+
+COUNTER_FIELDS = {
+    Favorite: 'favorites_count',
+    Cart: 'carts_count',
+}
+
+INSERT_SQL = '''
+    INSERT INTO {table} (user_id, recipe_id, created)
+    SELECT %s, recipe_id, %s FROM unnest(%s::bigint[]) AS recipe_id
+    ON CONFLICT (user_id, recipe_id) DO NOTHING
+    RETURNING recipe_id
+'''
+
+DELETE_SQL = '''
+    DELETE FROM {table}
+    WHERE user_id = %s AND recipe_id = ANY(%s::bigint[])
+    RETURNING recipe_id
+'''
+
+
+def _after_change(model, user, recipe_ids, sign):
+    increment(
+        Recipe.objects.filter(pk__in=recipe_ids),
+        COUNTER_FIELDS[model],
+        sign
+    )
+    if model is Cart:
+        shopping_list.add_recipes(user.pk, recipe_ids, sign)
+    bump_user_state_version(user.pk)
+
+
+def _find_recipes(recipe_ids):
+    return set(
+        Recipe.objects.filter(pk__in=recipe_ids).values_list('pk', flat=True)
+    )
+
+
+def _execute(sql, model, *params):
+    with connection.cursor() as cursor:
+        cursor.execute(sql.format(table=model._meta.db_table), params)
+        return {row[0] for row in cursor.fetchall()}
+
+
+@transaction.atomic
+def bulk_add(model, user, recipe_ids):
+    found = _find_recipes(recipe_ids)
+    created = set()
+    if found:
+        created = _execute(
+            INSERT_SQL, model, user.pk, timezone.now(), list(found)
+        )
+    if created:
+        _after_change(model, user, list(created), 1)
+    return {
+        pk: (
+            'not_found' if pk not in found
+            else 'created' if pk in created
+            else 'exists'
+        )
+        for pk in recipe_ids
+    }
+
+
+@transaction.atomic
+def bulk_remove(model, user, recipe_ids):
+    found = _find_recipes(recipe_ids)
+    deleted = set()
+    if found:
+        deleted = _execute(DELETE_SQL, model, user.pk, list(found))
+    if deleted:
+        _after_change(model, user, list(deleted), -1)
+    return {
+        pk: (
+            'not_found' if pk not in found
+            else 'deleted' if pk in deleted
+            else 'absent'
+        )
+        for pk in recipe_ids
+    }
@@ -0,0 +1,196 @@
+import json
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import router, transaction
+
+from recipes.models import Cart, Favorite, Ingredient, Tag
+from users.models import Follow
+
+USERS_VERSION_KEY = 'version:users'
+RECIPES_VERSION_KEY = 'version:recipes'
+USER_STATE_VERSION_KEY = 'version:user-state:{}'
+USER_SETS_KEY = 'user-sets:{}:{}'
+CACHE_STATS_KEY = 'cache-stats:{}:{}'
+RESPONSE_CACHES = ('recipe_list',)
+
+
+def get_version(key):
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def _bump_version(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, time.time_ns(), timeout=None)
+
+
+def bump_version(key):
+    transaction.on_commit(lambda: _bump_version(key))
+
+
+def get_user_state_version(user):
+    if not user.is_authenticated:
+        return None
+    return get_version(USER_STATE_VERSION_KEY.format(user.pk))
+
+
+def bump_user_state_version(user_id):
+    bump_version(USER_STATE_VERSION_KEY.format(user_id))
+
+
+def get_user_sets(user):
+    key = USER_SETS_KEY.format(user.pk, get_user_state_version(user))
+    sets = cache.get(key)
+    if sets is None:
+        sets = {
+            'favorites': set(
+                Favorite.objects.filter(user=user)
+                .values_list('recipe_id', flat=True)
+            ),
+            'carts': set(
+                Cart.objects.filter(user=user)
+                .values_list('recipe_id', flat=True)
+            ),
+            'follows': set(
+                Follow.objects.filter(user=user)
+                .values_list('author_id', flat=True)
+            ),
+        }
+        cache.set(key, sets, timeout=settings.RECIPE_LIST_CACHE_TIMEOUT)
+    return sets
+
+
+def record_cache_access(name, hit):
+    key = CACHE_STATS_KEY.format(name, 'hits' if hit else 'misses')
+    try:
+        cache.incr(key)
+    except ValueError:
+        if not cache.add(key, 1, timeout=None):
+            cache.incr(key)
+
+
+def get_cache_stats():
+    stats = {}
+    for name in RESPONSE_CACHES:
+        hits = cache.get(CACHE_STATS_KEY.format(name, 'hits'), 0)
+        misses = cache.get(CACHE_STATS_KEY.format(name, 'misses'), 0)
+        total = hits + misses
+        stats[name] = {
+            'hits': hits,
+            'misses': misses,
+            'hit_ratio': round(hits / total, 4) if total else None,
+        }
+    return stats
+
+
+class ReferenceCache:
+    def __init__(self, model, fields):
+        self.model = model
+        self.fields = fields
+        self.name = model._meta.label_lower
+        self._lock = threading.Lock()
+        self._version = None
+        self._json = b'[]'
+        self._rows = []
+        self._rows_by_id = {}
+        self._instances = []
+        self._instances_by_id = {}
+
+    def __deepcopy__(self, memo):
+        return self
+
+    @property
+    def version_key(self):
+        return f'reference:{self.name}:version'
+
+    def data_key(self, version):
+        return f'reference:{self.name}:{version}'
+
+    def get_version(self):
+        return get_version(self.version_key)
+
+    def invalidate(self):
+        bump_version(self.version_key)
+
+    def _load_payload(self, version):
+        payload = cache.get(self.data_key(version))
+        if payload is None:
+            rows = [
+                dict(zip(self.fields, values))
+                for values in self.model.objects.order_by('pk').values_list(
+                    *self.fields
+                )
+            ]
+            payload = json.dumps(
+                rows, ensure_ascii=False, separators=(',', ':')
+            ).encode('utf-8')
+            cache.set(
+                self.data_key(version),
+                payload,
+                timeout=settings.REFERENCE_CACHE_TIMEOUT
+            )
+        return payload
+
+    def _refresh(self):
+        version = self.get_version()
+        if version == self._version:
+            return
+        with self._lock:
+            if version == self._version:
+                return
+            payload = self._load_payload(version)
+            rows = json.loads(payload)
+            db = router.db_for_read(self.model)
+            instances = [
+                self.model.from_db(
+                    db, self.fields, [row[field] for field in self.fields]
+                )
+                for row in rows
+            ]
+            self._json = payload
+            self._rows = rows
+            self._rows_by_id = {row['id']: row for row in rows}
+            self._instances = instances
+            self._instances_by_id = {
+                instance.pk: instance for instance in instances
+            }
+            self._version = version
+
+    @property
+    def version(self):
+        self._refresh()
+        return self._version
+
+    def get_json(self):
+        self._refresh()
+        return self._json
+
+    def get_rows(self):
+        self._refresh()
+        return self._rows
+
+    def get_row(self, pk):
+        self._refresh()
+        return self._rows_by_id.get(pk)
+
+    def get_instances(self):
+        self._refresh()
+        return self._instances
+
+    def get_instance(self, pk):
+        self._refresh()
+        return self._instances_by_id.get(pk)
+
+
+tag_cache = ReferenceCache(Tag, ('id', 'name', 'color', 'slug'))
+ingredient_cache = ReferenceCache(
+    Ingredient, ('id', 'name', 'measurement_unit')
+)
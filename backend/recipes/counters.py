@@ -0,0 +1,65 @@
+from django.contrib.auth import get_user_model
+from django.db.models import Count, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+from recipes.models import Cart, Favorite, Recipe
+from users.models import Follow
+
+User = get_user_model()
+
+
+def increment(queryset, field, delta=1):
+    if delta >= 0:
+        value = F(field) + delta
+    else:
+        value = Greatest(F(field) + delta, 0)
+    return queryset.update(**{field: value})
+
+
+def count_subquery(model, field):
+    return Coalesce(
+        Subquery(
+            model.objects
+            .filter(**{field: OuterRef('pk')})
+            .order_by()
+            .values(field)
+            .annotate(total=Count('pk'))
+            .values('total')
+        ),
+        0
+    )
+
+
+COUNTERS = (
+    (Recipe, {
+        'favorites_count': (Favorite, 'recipe'),
+        'carts_count': (Cart, 'recipe'),
+    }),
+    (User, {
+        'recipes_count': (Recipe, 'author'),
+        'followers_count': (Follow, 'author'),
+    }),
+)
+
+
+def recount():
+    repaired = {}
+    for model, counters in COUNTERS:
+        actual = {
+            field: count_subquery(related_model, related_field)
+            for field, (related_model, related_field) in counters.items()
+        }
+        drift = Q()
+        for field in counters:
+            drift |= ~Q(**{field: F(f'actual_{field}')})
+        drifted = (
+            model.objects
+            .annotate(**{
+                f'actual_{field}': value for field, value in actual.items()
+            })
+            .filter(drift)
+        )
+        repaired[model._meta.label] = model.objects.filter(
+            pk__in=drifted.values('pk')
+        ).update(**actual)
+    return repaired
@@ -0,0 +1,107 @@
+from datetime import datetime
+
+from django.conf import settings
+from django.core.cache import cache
+
+from recipes.cache import get_version
+from recipes.models import Recipe
+from users.models import Follow
+
+FEEDS_VERSION_KEY = 'version:feeds'
+FEED_VERSION_KEY = 'version:feed:{}'
+FEED_KEY = 'feed:{}:{}:{}'
+FOLLOWERS_CHUNK_SIZE = 1000
+
+
+def get_feed_version_key(user_id):
+    return FEED_VERSION_KEY.format(user_id)
+
+
+def get_feed_key(user_id):
+    return FEED_KEY.format(
+        get_version(FEEDS_VERSION_KEY),
+        get_version(get_feed_version_key(user_id)),
+        user_id,
+    )
+
+
+def filter_feed(queryset, user_id):
+    return queryset.filter(
+        author_id__in=Follow.objects.filter(user_id=user_id)
+        .values('author_id')
+    )
+
+
+def load_entries(queryset, size):
+    rows = list(
+        queryset.order_by('-pub_date', '-id')
+        .values_list('pub_date', 'id', 'author_id')[:size + 1]
+    )
+    return rows[:size], len(rows) <= size
+
+
+def get_feed(user_id):
+    key = get_feed_key(user_id)
+    feed = cache.get(key)
+    if feed is None:
+        entries, complete = load_entries(
+            filter_feed(Recipe.objects.all(), user_id),
+            settings.FEED_CACHE_SIZE,
+        )
+        feed = {'entries': entries, 'complete': complete}
+        cache.set(key, feed, timeout=settings.FEED_CACHE_TIMEOUT)
+    return feed
+
+
+def invalidate_feeds(user_ids):
+    keys = cache.get_many([
+        get_feed_version_key(user_id) for user_id in user_ids
+    ])
+    for key in keys:
+        try:
+            cache.incr(key)
+        except ValueError:
+            pass
+
+
+def invalidate_followers(author_id):
+    followers = (
+        Follow.objects.filter(author_id=author_id)
+        .values_list('user_id', flat=True).iterator()
+    )
+    chunk = []
+    for user_id in followers:
+        chunk.append(user_id)
+        if len(chunk) >= FOLLOWERS_CHUNK_SIZE:
+            invalidate_feeds(chunk)
+            chunk = []
+    invalidate_feeds(chunk)
+
+
+def select_page_ids(feed, cursor, page_size):
+    entries, complete = feed['entries'], feed['complete']
+    if cursor is None:
+        selected = entries[:page_size + 1]
+        return [entry[1] for entry in selected] if (
+            complete or len(selected) > page_size
+        ) else None
+    (pub_date, recipe_id), reverse = cursor
+    try:
+        position = (datetime.fromisoformat(pub_date), int(recipe_id))
+    except (TypeError, ValueError):
+        return None
+    if position[0].tzinfo is None:
+        return None
+    if not complete and (not entries or position < entries[-1][:2]):
+        return None
+    if reverse:
+        selected = [
+            entry for entry in entries if entry[:2] > position
+        ][-page_size - 1:]
+    else:
+        selected = [
+            entry for entry in entries if entry[:2] < position
+        ][:page_size + 1]
+        if not complete and len(selected) <= page_size:
+            return None
+    return [entry[1] for entry in selected]
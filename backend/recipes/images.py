@@ -0,0 +1,86 @@
+import io
+import os
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+from recipes.cache import RECIPES_VERSION_KEY, bump_version
+from recipes.models import Recipe
+
+IMAGE_FORMATS = {
+    'webp': ('WEBP', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+
+def variant_name(image_name, width, extension):
+    stem, _ = os.path.splitext(image_name)
+    return f'{stem}_{width}w.{extension}'
+
+
+def resize(image, width):
+    if image.width <= width:
+        return image.copy()
+    height = round(image.height * width / image.width)
+    return image.resize((width, height), Image.LANCZOS)
+
+
+def encode(image, extension):
+    image_format, options = IMAGE_FORMATS[extension]
+    if image_format == 'JPEG' and image.mode != 'RGB':
+        image = image.convert('RGB')
+    buffer = io.BytesIO()
+    image.save(buffer, image_format, **options)
+    return buffer.getvalue()
+
+
+def process_recipe_image(recipe_id, image_name):
+    with default_storage.open(image_name) as file:
+        image = Image.open(file)
+        image.load()
+    image = ImageOps.exif_transpose(image)
+    if image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if 'A' in image.getbands() else 'RGB')
+    variants = {'source': image_name}
+    for extension in settings.RECIPE_IMAGE_FORMATS:
+        variants[extension] = {}
+        for width in settings.RECIPE_IMAGE_WIDTHS:
+            name = variant_name(image_name, width, extension)
+            if default_storage.exists(name):
+                default_storage.delete(name)
+            name = default_storage.save(
+                name, ContentFile(encode(resize(image, width), extension))
+            )
+            variants[extension][str(width)] = name
+    updated = Recipe.objects.filter(pk=recipe_id, image=image_name).update(
+        image_variants=variants,
+        modified=timezone.now()
+    )
+    if updated:
+        bump_version(RECIPES_VERSION_KEY)
+
+
+def needs_processing(recipe):
+    return bool(recipe.image) and (
+        recipe.image_variants.get('source') != recipe.image.name
+    )
+
+
+def get_srcset(recipe, request=None):
+    if not recipe.image or needs_processing(recipe):
+        return None
+    srcset = {}
+    for extension in settings.RECIPE_IMAGE_FORMATS:
+        candidates = []
+        variants = recipe.image_variants.get(extension, {})
+        for width, name in sorted(variants.items(), key=lambda v: int(v[0])):
+            url = default_storage.url(name)
+            if request is not None:
+                url = request.build_absolute_uri(url)
+            candidates.append(f'{url} {width}w')
+        if candidates:
+            srcset[extension] = ', '.join(candidates)
+    return srcset or None
@@ -0,0 +1,115 @@
+import csv
+import io
+import json
+
+from django.db import connection, transaction
+
+from recipes.models import Ingredient
+
+INGREDIENTS_TABLE = Ingredient._meta.db_table
+NAME_LENGTH = Ingredient._meta.get_field('name').max_length
+UNIT_LENGTH = Ingredient._meta.get_field('measurement_unit').max_length
+JSON_CHUNK_SIZE = 64 * 1024
+
+CREATE_STAGING_SQL = '''
+    CREATE TEMPORARY TABLE ingredient_import (
+        name text,
+        measurement_unit text
+    ) ON COMMIT DROP
+'''
+
+COPY_SQL = 'COPY ingredient_import (name, measurement_unit) FROM STDIN'
+
+UPSERT_SQL = f'''
+    INSERT INTO {INGREDIENTS_TABLE} (name, measurement_unit)
+    SELECT name, measurement_unit FROM ingredient_import
+    ON CONFLICT (name, measurement_unit) DO NOTHING
+'''
+
+
+def read_csv(file):
+    for row in csv.reader(file):
+        if row:
+            yield row[0], row[1] if len(row) > 1 else ''
+
+
+def iter_json_array(file):
+    decoder = json.JSONDecoder()
+    buffer = file.read(JSON_CHUNK_SIZE).lstrip()
+    if not buffer.startswith('['):
+        raise ValueError('Ожидается JSON-массив.')
+    position = 1
+    finished = False
+    while True:
+        while position < len(buffer) and buffer[position] in ' \t\r\n,':
+            position += 1
+        if position < len(buffer) and buffer[position] == ']':
+            return
+        try:
+            item, end = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            if finished:
+                raise
+            chunk = file.read(JSON_CHUNK_SIZE)
+            finished = not chunk
+            buffer = buffer[position:] + chunk
+            position = 0
+            continue
+        yield item
+        position = end
+
+
+def read_json(file):
+    for item in iter_json_array(file):
+        yield item.get('name', ''), item.get('measurement_unit', '')
+
+
+READERS = {
+    'csv': read_csv,
+    'json': read_json,
+}
+
+
+def escape(value):
+    return (
+        value.replace('\\', '\\\\').replace('\t', '\\t')
+        .replace('\n', '\\n').replace('\r', '\\r')
+    )
+
+
+def copy_rows(cursor, buffer):
+    buffer.seek(0)
+    cursor.copy_expert(COPY_SQL, buffer)
+
+
+def import_ingredients(rows, batch_size=10000):
+    seen = set()
+    skipped = 0
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(CREATE_STAGING_SQL)
+        buffer = io.StringIO()
+        buffered = 0
+        for name, measurement_unit in rows:
+            key = (name.strip(), measurement_unit.strip())
+            if (
+                not all(key) or key in seen
+                or len(key[0]) > NAME_LENGTH or len(key[1]) > UNIT_LENGTH
+            ):
+                skipped += 1
+                continue
+            seen.add(key)
+            buffer.write(f'{escape(key[0])}\t{escape(key[1])}\n')
+            buffered += 1
+            if buffered >= batch_size:
+                copy_rows(cursor, buffer)
+                buffer = io.StringIO()
+                buffered = 0
+        if buffered:
+            copy_rows(cursor, buffer)
+        cursor.execute(UPSERT_SQL)
+        inserted = cursor.rowcount
+    return {
+        'inserted': inserted,
+        'existing': len(seen) - inserted,
+        'skipped': skipped,
+    }
@@ -0,0 +1,58 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+
+from recipes.models import Ingredient
+from recipes.search import (ingredient_index, search_ingredients_in_database,
+                            search_ingredients_in_memory)
+
+
+def search_with_prefix_filter(query, limit):
+    return list(Ingredient.objects.filter(name__istartswith=query))
+
+
+class Command(BaseCommand):
+    help = 'Compare ingredient search latency (p50/p99) across backends'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rounds', type=int, default=20,
+            help='How many times every query is repeated'
+        )
+        parser.add_argument(
+            '--limit', type=int, default=30,
+            help='Result limit passed to the ranked backends'
+        )
+
+    def handle(self, *args, **options):
+        names = Ingredient.objects.values_list('name', flat=True)[:200]
+        queries = sorted({
+            name[:length].lower()
+            for name in names
+            for length in (1, 2, 3, 5)
+            if name[:length].strip()
+        })
+        if not queries:
+            self.stderr.write('Нет ингредиентов для замера.')
+            return
+        ingredient_index.invalidate()
+        search_ingredients_in_memory(queries[0], options['limit'])
+        backends = (
+            ('prefix filter', search_with_prefix_filter),
+            ('database', search_ingredients_in_database),
+            ('memory', search_ingredients_in_memory),
+        )
+        for label, backend in backends:
+            timings = []
+            for _ in range(options['rounds']):
+                for query in queries:
+                    started = time.perf_counter()
+                    backend(query, options['limit'])
+                    timings.append((time.perf_counter() - started) * 1000)
+            percentiles = statistics.quantiles(timings, n=100)
+            self.stdout.write(
+                f'{label}: p50={percentiles[49]:.3f}ms '
+                f'p99={percentiles[98]:.3f}ms '
+                f'({len(timings)} запросов)'
+            )
@@ -0,0 +1,51 @@
+from collections import Counter
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from recipes.ingredient_import import READERS
+from recipes.models import Ingredient
+from recipes.units import UNIT_TABLE, get_unit_key, normalize_unit
+
+
+class Command(BaseCommand):
+    help = (
+        'Check that measurement units from a CSV/JSON file or from the '
+        'database are known to the unit conversion table'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', nargs='?',
+            help='Path to the CSV or JSON file, the database by default'
+        )
+        parser.add_argument('--format', choices=sorted(READERS))
+
+    def read_units(self, path, file_format):
+        if path is None:
+            return Counter(
+                Ingredient.objects.values_list('measurement_unit', flat=True)
+            )
+        file_format = file_format or Path(path).suffix[1:].lower()
+        if file_format not in READERS:
+            raise CommandError(f'Неизвестный формат файла: {path}')
+        try:
+            with open(path, encoding='utf-8', newline='') as file:
+                return Counter(unit for _, unit in READERS[file_format](file))
+        except (OSError, ValueError) as error:
+            raise CommandError(error)
+
+    def handle(self, *args, **options):
+        units = self.read_units(options['path'], options['format'])
+        unknown = []
+        for unit, count in units.most_common():
+            base_unit, factor = normalize_unit(unit)
+            if get_unit_key(unit) not in UNIT_TABLE:
+                unknown.append(unit)
+            self.stdout.write(f'{unit!r} ({count}): {factor} {base_unit}')
+        if unknown:
+            raise CommandError(
+                'Единицы измерения без нормализации: '
+                + ', '.join(map(repr, unknown))
+            )
+        self.stdout.write(f'Все единицы измерения известны: {len(units)}')
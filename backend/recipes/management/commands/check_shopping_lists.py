@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from recipes import shopping_list
+
+
+class Command(BaseCommand):
+    help = 'Compare shopping lists with carts and rebuild them from scratch'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Only report differences, do not rebuild'
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            differences = shopping_list.diff()
+            for user_id, ingredient_id, stored, expected in differences:
+                self.stdout.write(
+                    f'user={user_id} ingredient={ingredient_id}: '
+                    f'{stored} -> {expected}'
+                )
+            if not options['dry_run']:
+                shopping_list.rebuild()
+        self.stdout.write(f'Расхождений: {len(differences)}')
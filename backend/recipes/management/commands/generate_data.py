@@ -0,0 +1,275 @@
+import io
+import random
+from datetime import datetime, timedelta, timezone
+from itertools import accumulate
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from PIL import Image
+
+from recipes import counters, shopping_list
+from recipes.cache import (RECIPES_VERSION_KEY, USERS_VERSION_KEY,
+                           bump_version, ingredient_cache, tag_cache)
+from recipes.feed import FEEDS_VERSION_KEY
+from recipes.models import (Cart, Favorite, Ingredient, Recipe,
+                            RecipeIngredient, Tag)
+from recipes.pantry import PANTRY_VERSION_KEY
+from recipes.search import update_recipe_search_vectors
+from recipes.trending import update_trending_scores
+from users.models import Follow
+
+User = get_user_model()
+
+IMAGE_NAME = 'images/generated.png'
+BASE_DATE = datetime(2024, 1, 1, tzinfo=timezone.utc)
+UNITS = ('г', 'кг', 'мл', 'л', 'шт.', 'ст. л.', 'ч. л.', 'по вкусу')
+WORDS = (
+    'суп', 'салат', 'пирог', 'каша', 'рагу', 'запеканка', 'омлет',
+    'паста', 'котлеты', 'блины', 'соус', 'десерт', 'жаркое', 'плов',
+)
+
+SET_DATES_SQL = '''
+    UPDATE recipes_recipe AS recipe
+    SET pub_date = dates.pub_date, modified = dates.pub_date
+    FROM unnest(%s::bigint[], %s::timestamptz[]) AS dates(id, pub_date)
+    WHERE recipe.id = dates.id
+'''
+
+
+def zipf_weights(count, skew):
+    return list(accumulate(1 / (rank + 1) ** skew for rank in range(count)))
+
+
+def pick(rng, items, cum_weights, count):
+    if not items:
+        return set()
+    return set(rng.choices(items, cum_weights=cum_weights, k=count))
+
+
+class Command(BaseCommand):
+    help = 'Generate a synthetic dataset for load tests and benchmarks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument(
+            '--recipes-per-user', type=float, default=5,
+            help='Average number of recipes per user'
+        )
+        parser.add_argument(
+            '--skew', type=float, default=1.1,
+            help='Zipf exponent for authors, recipes and followed users'
+        )
+        parser.add_argument('--tags', type=int, default=8)
+        parser.add_argument(
+            '--ingredients', type=int, default=2000,
+            help='Minimal number of ingredients in the database'
+        )
+        parser.add_argument('--ingredients-per-recipe', type=int, default=8)
+        parser.add_argument('--follows-per-user', type=int, default=10)
+        parser.add_argument('--favorites-per-user', type=int, default=20)
+        parser.add_argument('--carts-per-user', type=int, default=3)
+        parser.add_argument('--prefix', default='generated')
+        parser.add_argument('--password', default='generated-password')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--batch-size', type=int, default=2000)
+        parser.add_argument(
+            '--clear', action='store_true',
+            help='Delete users generated earlier with the same prefix'
+        )
+
+    def handle(self, *args, **options):
+        self.options = options
+        self.batch_size = options['batch_size']
+        generated = User.objects.filter(
+            username__startswith=options['prefix'],
+            email__endswith='@example.com',
+        )
+        with transaction.atomic():
+            if options['clear']:
+                generated.delete()
+            elif generated.exists():
+                raise CommandError(
+                    'Данные с таким префиксом уже созданы, '
+                    'используйте --clear.'
+                )
+            tags = self.create_tags()
+            ingredients = self.create_ingredients()
+            users = self.create_users()
+            recipes = self.create_recipes(users, tags, ingredients)
+            follows = self.create_relations(
+                Follow, 'author_id', users, users,
+                options['follows_per_user']
+            )
+            favorites = self.create_relations(
+                Favorite, 'recipe_id', users, recipes,
+                options['favorites_per_user']
+            )
+            carts = self.create_relations(
+                Cart, 'recipe_id', users, recipes, options['carts_per_user']
+            )
+            counters.recount()
+            shopping_list.rebuild()
+            update_recipe_search_vectors(recipes)
+            update_trending_scores()
+            tag_cache.invalidate()
+            ingredient_cache.invalidate()
+            bump_version(USERS_VERSION_KEY)
+            bump_version(RECIPES_VERSION_KEY)
+            bump_version(FEEDS_VERSION_KEY)
+            bump_version(PANTRY_VERSION_KEY)
+        self.stdout.write(
+            f'Пользователей: {len(users)}, рецептов: {len(recipes)}, '
+            f'подписок: {follows}, в избранном: {favorites}, '
+            f'в корзинах: {carts}'
+        )
+
+    def get_random(self, stage):
+        return random.Random(f'{self.options["seed"]}-{stage}')
+
+    def create_tags(self):
+        rng = self.get_random('tags')
+        Tag.objects.bulk_create(
+            [
+                Tag(
+                    name=f'Тег {number}',
+                    slug=f'tag-{number}',
+                    color=f'#{rng.randrange(0x1000000):06x}',
+                )
+                for number in range(self.options['tags'])
+            ],
+            ignore_conflicts=True,
+        )
+        return list(Tag.objects.order_by('pk').values_list('pk', flat=True))
+
+    def create_ingredients(self):
+        rng = self.get_random('ingredients')
+        existing = Ingredient.objects.count()
+        Ingredient.objects.bulk_create(
+            [
+                Ingredient(
+                    name=f'ингредиент {number}',
+                    measurement_unit=rng.choice(UNITS),
+                )
+                for number in range(existing, self.options['ingredients'])
+            ],
+            batch_size=self.batch_size,
+            ignore_conflicts=True,
+        )
+        return list(
+            Ingredient.objects.order_by('pk').values_list('pk', flat=True)
+        )
+
+    def create_users(self):
+        prefix = self.options['prefix']
+        password = make_password(self.options['password'])
+        users = User.objects.bulk_create(
+            [
+                User(
+                    username=f'{prefix}{number}',
+                    email=f'{prefix}{number}@example.com',
+                    first_name='Имя',
+                    last_name=f'Фамилия {number}',
+                    password=password,
+                )
+                for number in range(self.options['users'])
+            ],
+            batch_size=self.batch_size,
+        )
+        user_ids = [user.pk for user in users]
+        self.get_random('users').shuffle(user_ids)
+        return user_ids
+
+    def get_image(self):
+        if not default_storage.exists(IMAGE_NAME):
+            buffer = io.BytesIO()
+            Image.new('RGB', (640, 480), '#e0a060').save(buffer, 'PNG')
+            default_storage.save(IMAGE_NAME, ContentFile(buffer.getvalue()))
+        return IMAGE_NAME
+
+    def create_recipes(self, users, tags, ingredients):
+        self.rng = self.get_random('recipes')
+        total = round(len(users) * self.options['recipes_per_user'])
+        authors = self.rng.choices(
+            users, cum_weights=zipf_weights(len(users), self.options['skew']),
+            k=total,
+        )
+        image = self.get_image()
+        recipe_ids = []
+        for start in range(0, total, self.batch_size):
+            batch = authors[start:start + self.batch_size]
+            recipes = Recipe.objects.bulk_create([
+                Recipe(
+                    author_id=author,
+                    name=f'{self.rng.choice(WORDS).capitalize()} '
+                         f'№{start + number}',
+                    text=' '.join(self.rng.choices(WORDS, k=30)),
+                    cooking_time=self.rng.randint(5, 180),
+                    image=image,
+                )
+                for number, author in enumerate(batch)
+            ])
+            ids = [recipe.pk for recipe in recipes]
+            self.set_dates(ids)
+            self.add_recipe_items(ids, tags, ingredients)
+            recipe_ids.extend(ids)
+        self.rng.shuffle(recipe_ids)
+        return recipe_ids
+
+    def set_dates(self, recipe_ids):
+        dates = [
+            BASE_DATE + timedelta(seconds=self.rng.randrange(365 * 86400))
+            for _ in recipe_ids
+        ]
+        with connection.cursor() as cursor:
+            cursor.execute(SET_DATES_SQL, (recipe_ids, dates))
+
+    def add_recipe_items(self, recipe_ids, tags, ingredients):
+        recipe_tags = []
+        recipe_ingredients = []
+        per_recipe = min(
+            self.options['ingredients_per_recipe'], len(ingredients)
+        )
+        for recipe_id in recipe_ids:
+            count = self.rng.randint(1, min(3, len(tags)))
+            recipe_tags.extend(
+                Recipe.tags.through(recipe_id=recipe_id, tag_id=tag)
+                for tag in self.rng.sample(tags, count)
+            )
+            count = self.rng.randint(max(per_recipe // 2, 1), per_recipe)
+            recipe_ingredients.extend(
+                RecipeIngredient(
+                    recipe_id=recipe_id,
+                    ingredient_id=ingredient,
+                    amount=self.rng.randint(1, 500),
+                )
+                for ingredient in self.rng.sample(ingredients, count)
+            )
+        Recipe.tags.through.objects.bulk_create(
+            recipe_tags, batch_size=self.batch_size
+        )
+        RecipeIngredient.objects.bulk_create(
+            recipe_ingredients, batch_size=self.batch_size
+        )
+
+    def create_relations(self, model, field, users, targets, per_user):
+        rng = self.get_random(model.__name__)
+        cum_weights = zipf_weights(len(targets), self.options['skew'])
+        objects = []
+        before = model.objects.count()
+        for user in users:
+            chosen = pick(rng, targets, cum_weights, per_user)
+            if model is Follow:
+                chosen.discard(user)
+            objects.extend(
+                model(user_id=user, **{field: target})
+                for target in sorted(chosen)
+            )
+            if len(objects) >= self.batch_size:
+                model.objects.bulk_create(objects, ignore_conflicts=True)
+                objects = []
+        model.objects.bulk_create(objects, ignore_conflicts=True)
+        return model.objects.count() - before
@@ -1,21 +1,41 @@
-import csv
+import time
+from pathlib import Path
 
-from django.core.management.base import BaseCommand
-from recipes.models import Ingredient
+from django.core.management.base import BaseCommand, CommandError
+from recipes.cache import ingredient_cache
+from recipes.ingredient_import import READERS, import_ingredients
 
 
 class Command(BaseCommand):
-    help = 'Import ingredients from CSV file'
+    help = 'Import ingredients from CSV or JSON file'
 
     def add_arguments(self, parser):
-        parser.add_argument('csv_file', type=str, help='Path to the CSV file')
+        parser.add_argument(
+            'path', type=str, help='Path to the CSV or JSON file'
+        )
+        parser.add_argument(
+            '--format', choices=sorted(READERS),
+            help='File format, detected from the extension by default'
+        )
+        parser.add_argument('--batch-size', type=int, default=10000)
 
     def handle(self, *args, **options):
-        csv_file_path = options['csv_file']
-        with open(csv_file_path, 'r') as file:
-            reader = csv.reader(file)
-            list_ingredients = [
-                Ingredient(name=row[0], measurement_unit=row[1])
-                for row in reader
-            ]
-        Ingredient.objects.bulk_create(list_ingredients)
+        path = options['path']
+        file_format = options['format'] or Path(path).suffix[1:].lower()
+        if file_format not in READERS:
+            raise CommandError(f'Неизвестный формат файла: {path}')
+        started = time.perf_counter()
+        try:
+            with open(path, encoding='utf-8', newline='') as file:
+                stats = import_ingredients(
+                    READERS[file_format](file), options['batch_size']
+                )
+        except (OSError, ValueError) as error:
+            raise CommandError(error)
+        ingredient_cache.invalidate()
+        self.stdout.write(
+            f'Добавлено: {stats["inserted"]}, '
+            f'уже были в базе: {stats["existing"]}, '
+            f'пропущено: {stats["skipped"]} '
+            f'({time.perf_counter() - started:.1f} с)'
+        )
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from recipes.images import needs_processing, process_recipe_image
+from recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    help = 'Generate missing resized variants of recipe images'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all', action='store_true',
+            help='Regenerate variants for every recipe'
+        )
+
+    def handle(self, *args, **options):
+        processed = failed = 0
+        recipes = Recipe.objects.only('id', 'image', 'image_variants')
+        for recipe in recipes.iterator():
+            if not recipe.image:
+                continue
+            if options['all'] or needs_processing(recipe):
+                try:
+                    process_recipe_image(recipe.pk, recipe.image.name)
+                except OSError as error:
+                    failed += 1
+                    self.stderr.write(f'{recipe.image.name}: {error}')
+                    continue
+                processed += 1
+        self.stdout.write(
+            f'Обработано изображений: {processed}, с ошибками: {failed}'
+        )
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from recipes.counters import recount
+
+
+class Command(BaseCommand):
+    help = 'Recalculate favorite, cart, recipe and follower counters'
+
+    def handle(self, *args, **options):
+        for label, repaired in recount().items():
+            self.stdout.write(f'{label}: исправлено записей - {repaired}')
@@ -0,0 +1,45 @@
+import time
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management.base import BaseCommand, CommandError
+
+from recipes.similarity import ENGINES, refresh_similar_recipes
+
+
+class Command(BaseCommand):
+    help = 'Precompute the most similar recipes by ingredients and tags'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full', action='store_true',
+            help='Recompute all recipes instead of the changed ones'
+        )
+        parser.add_argument(
+            '--count', type=int, default=settings.SIMILAR_RECIPES_COUNT,
+            help='Number of similar recipes to keep per recipe'
+        )
+        parser.add_argument(
+            '--chunk-size', type=int,
+            default=settings.SIMILAR_RECIPES_CHUNK_SIZE,
+            help='Number of recipes compared with the catalog at once'
+        )
+        parser.add_argument(
+            '--backend', choices=('auto', *ENGINES), default='auto'
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        try:
+            refreshed = refresh_similar_recipes(
+                full=options['full'],
+                count=options['count'],
+                chunk_size=options['chunk_size'],
+                backend=options['backend'],
+            )
+        except ImproperlyConfigured as error:
+            raise CommandError(error)
+        self.stdout.write(
+            f'Пересчитано рецептов: {refreshed}, '
+            f'время: {time.perf_counter() - started:.2f} с'
+        )
@@ -0,0 +1,34 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from recipes.trending import update_trending_scores
+
+
+class Command(BaseCommand):
+    help = 'Recompute time-decayed trending scores of recipes'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--window-days', type=float,
+            default=settings.TRENDING_WINDOW_DAYS,
+            help='Only count favorites and carts added within this window'
+        )
+        parser.add_argument(
+            '--half-life-hours', type=float,
+            default=settings.TRENDING_HALF_LIFE_HOURS,
+            help='Time after which an event weighs half as much'
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        scored = update_trending_scores(
+            window=timedelta(days=options['window_days']),
+            half_life=timedelta(hours=options['half_life_hours']),
+        )
+        self.stdout.write(
+            f'Рецептов с рейтингом: {scored}, '
+            f'время: {time.perf_counter() - started:.2f} с'
+        )
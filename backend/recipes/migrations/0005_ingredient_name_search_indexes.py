@@ -0,0 +1,29 @@
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0004_auto_20230916_2039'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.RunSQL(
+            sql=(
+                'CREATE INDEX ingredient_name_prefix_idx '
+                'ON recipes_ingredient '
+                '(UPPER(name::text) text_pattern_ops);'
+            ),
+            reverse_sql='DROP INDEX ingredient_name_prefix_idx;',
+        ),
+        migrations.RunSQL(
+            sql=(
+                'CREATE INDEX ingredient_name_trgm_idx '
+                'ON recipes_ingredient '
+                'USING gin (UPPER(name::text) gin_trgm_ops);'
+            ),
+            reverse_sql='DROP INDEX ingredient_name_trgm_idx;',
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 3.2.16 on 2026-10-18 20:48
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('recipes', '0008_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ShoppingListItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('amount', models.PositiveIntegerField(verbose_name='Кол-во')),
+                ('ingredient', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='shopping_list_items', to='recipes.ingredient', verbose_name='Ингредиент')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='shopping_list', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+            ],
+            options={
+                'verbose_name': 'Позиция списка покупок',
+                'verbose_name_plural': 'Позиции списка покупок',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='shoppinglistitem',
+            constraint=models.UniqueConstraint(fields=('user', 'ingredient'), name='unique_shopping_list_item'),
+        ),
+        migrations.RunSQL(
+            sql=(
+                'INSERT INTO recipes_shoppinglistitem '
+                '(user_id, ingredient_id, amount) '
+                'SELECT cart.user_id, recipe_ingredient.ingredient_id, '
+                'SUM(recipe_ingredient.amount) '
+                'FROM recipes_cart AS cart '
+                'JOIN recipes_recipeingredient AS recipe_ingredient '
+                'ON recipe_ingredient.recipe_id = cart.recipe_id '
+                'GROUP BY cart.user_id, recipe_ingredient.ingredient_id;'
+            ),
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
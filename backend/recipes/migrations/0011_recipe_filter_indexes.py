@@ -0,0 +1,28 @@
+# Generated by Django 3.2.16 on 2026-10-18 21:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0010_recipe_image_variants'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='cart',
+            index=models.Index(fields=['recipe', 'user'], name='cart_recipe_user_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='favorite',
+            index=models.Index(fields=['recipe', 'user'], name='favorite_recipe_user_idx'),
+        ),
+        migrations.RunSQL(
+            sql=(
+                'CREATE INDEX recipe_tags_tag_recipe_idx '
+                'ON recipes_recipe_tags (tag_id, recipe_id);'
+            ),
+            reverse_sql='DROP INDEX recipe_tags_tag_recipe_idx;',
+        ),
+    ]
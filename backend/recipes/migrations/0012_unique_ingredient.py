@@ -0,0 +1,71 @@
+# Generated by Django 3.2.16 on 2026-10-18 21:04
+
+from django.db import migrations, models
+
+MERGE_DUPLICATES_SQL = [
+    'SET CONSTRAINTS ALL IMMEDIATE;',
+
+    'CREATE TEMPORARY TABLE ingredient_duplicates AS '
+    'SELECT id, keep_id FROM ('
+    'SELECT id, MIN(id) OVER (PARTITION BY name, measurement_unit) AS keep_id '
+    'FROM recipes_ingredient) AS ranked '
+    'WHERE id <> keep_id;',
+
+    'UPDATE recipes_recipeingredient AS item '
+    'SET ingredient_id = duplicate.keep_id '
+    'FROM ingredient_duplicates AS duplicate '
+    'WHERE item.ingredient_id = duplicate.id;',
+
+    'WITH merged AS ('
+    'SELECT recipe_id, ingredient_id, MIN(id) AS keep_id, '
+    'SUM(amount) AS amount '
+    'FROM recipes_recipeingredient '
+    'WHERE ingredient_id IN (SELECT keep_id FROM ingredient_duplicates) '
+    'GROUP BY recipe_id, ingredient_id HAVING COUNT(*) > 1), '
+    'updated AS ('
+    'UPDATE recipes_recipeingredient AS item SET amount = merged.amount '
+    'FROM merged WHERE item.id = merged.keep_id) '
+    'DELETE FROM recipes_recipeingredient AS item USING merged '
+    'WHERE item.recipe_id = merged.recipe_id '
+    'AND item.ingredient_id = merged.ingredient_id '
+    'AND item.id <> merged.keep_id;',
+
+    'INSERT INTO recipes_shoppinglistitem (user_id, ingredient_id, amount) '
+    'SELECT item.user_id, duplicate.keep_id, SUM(item.amount) '
+    'FROM recipes_shoppinglistitem AS item '
+    'JOIN ingredient_duplicates AS duplicate '
+    'ON item.ingredient_id = duplicate.id '
+    'GROUP BY item.user_id, duplicate.keep_id '
+    'ON CONFLICT (user_id, ingredient_id) DO UPDATE '
+    'SET amount = recipes_shoppinglistitem.amount + EXCLUDED.amount;',
+
+    'DELETE FROM recipes_shoppinglistitem AS item '
+    'USING ingredient_duplicates AS duplicate '
+    'WHERE item.ingredient_id = duplicate.id;',
+
+    'DELETE FROM recipes_ingredient AS ingredient '
+    'USING ingredient_duplicates AS duplicate '
+    'WHERE ingredient.id = duplicate.id;',
+
+    'DROP TABLE ingredient_duplicates;',
+
+    'SET CONSTRAINTS ALL DEFERRED;',
+]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0011_recipe_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql=MERGE_DUPLICATES_SQL,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+        migrations.AddConstraint(
+            model_name='ingredient',
+            constraint=models.UniqueConstraint(fields=('name', 'measurement_unit'), name='unique_ingredient'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 3.2.16 on 2026-10-18 21:06
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+UPDATE_SEARCH_VECTORS_SQL = '''
+    UPDATE recipes_recipe AS recipe
+    SET search_vector =
+        setweight(to_tsvector('russian', recipe.name), 'A')
+        || setweight(to_tsvector('russian', COALESCE((
+            SELECT string_agg(ingredient.name, ' ')
+            FROM recipes_recipeingredient AS item
+            JOIN recipes_ingredient AS ingredient
+                ON ingredient.id = item.ingredient_id
+            WHERE item.recipe_id = recipe.id
+        ), '')), 'B')
+        || setweight(to_tsvector('russian', recipe.text), 'C')
+'''
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0012_unique_ingredient'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True, verbose_name='Поисковый вектор'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='recipe_search_vector_idx'),
+        ),
+        migrations.RunSQL(UPDATE_SEARCH_VECTORS_SQL, migrations.RunSQL.noop),
+    ]
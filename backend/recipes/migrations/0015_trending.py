@@ -0,0 +1,50 @@
+# Generated by Django 3.2.16 on 2026-10-18 21:13
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0014_recipe_author_pub_date_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecipeScore',
+            fields=[
+                ('recipe', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='score', serialize=False, to='recipes.recipe', verbose_name='Рецепт')),
+                ('score', models.FloatField(verbose_name='Популярность')),
+            ],
+            options={
+                'verbose_name': 'Популярность рецепта',
+                'verbose_name_plural': 'Популярность рецептов',
+            },
+        ),
+        migrations.AddField(
+            model_name='cart',
+            name='created',
+            field=models.DateTimeField(auto_now_add=True, default=django.utils.timezone.now, verbose_name='Дата добавления'),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='favorite',
+            name='created',
+            field=models.DateTimeField(auto_now_add=True, default=django.utils.timezone.now, verbose_name='Дата добавления'),
+            preserve_default=False,
+        ),
+        migrations.AddIndex(
+            model_name='cart',
+            index=models.Index(fields=['created'], name='cart_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='favorite',
+            index=models.Index(fields=['created'], name='favorite_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recipescore',
+            index=models.Index(fields=['-score', '-recipe'], name='recipe_score_idx'),
+        ),
+    ]
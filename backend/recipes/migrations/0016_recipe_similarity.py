@@ -0,0 +1,33 @@
+# Generated by Django 3.2.16 on 2026-10-18 21:15
+
+import django.contrib.postgres.fields
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0015_trending'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecipeSimilarity',
+            fields=[
+                ('recipe', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='similarity', serialize=False, to='recipes.recipe', verbose_name='Рецепт')),
+                ('similar_ids', django.contrib.postgres.fields.ArrayField(base_field=models.BigIntegerField(), default=list, size=None, verbose_name='Похожие рецепты')),
+                ('scores', django.contrib.postgres.fields.ArrayField(base_field=models.FloatField(), default=list, size=None, verbose_name='Сходство')),
+                ('updated', models.DateTimeField(verbose_name='Дата расчета')),
+            ],
+            options={
+                'verbose_name': 'Похожие рецепты',
+                'verbose_name_plural': 'Похожие рецепты',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='recipesimilarity',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['similar_ids'], name='recipe_similar_ids_idx'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 3.2.16 on 2026-10-18 21:38
+
+from django.db import migrations, models
+
+COPY_SCORES_SQL = '''
+    UPDATE recipes_recipe AS recipe
+    SET trending_score = score.score
+    FROM recipes_recipescore AS score
+    WHERE recipe.id = score.recipe_id
+'''
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0016_recipe_similarity'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='trending_score',
+            field=models.FloatField(default=0, editable=False, verbose_name='Популярность'),
+        ),
+        migrations.RunSQL(COPY_SCORES_SQL, migrations.RunSQL.noop),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['-trending_score', '-id'], name='recipe_trending_idx'),
+        ),
+        migrations.DeleteModel(
+            name='RecipeScore',
+        ),
+    ]
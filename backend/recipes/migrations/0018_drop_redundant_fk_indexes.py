@@ -0,0 +1,43 @@
+# Generated by Django 3.2.16 on 2026-10-18 22:00
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('recipes', '0017_recipe_trending_score'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='cart',
+            name='recipe',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='carts', to='recipes.recipe', verbose_name='Рецепт'),
+        ),
+        migrations.AlterField(
+            model_name='cart',
+            name='user',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='carts', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь'),
+        ),
+        migrations.AlterField(
+            model_name='favorite',
+            name='recipe',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='favorites', to='recipes.recipe', verbose_name='Рецепт'),
+        ),
+        migrations.AlterField(
+            model_name='favorite',
+            name='user',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='favorites', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь'),
+        ),
+        migrations.RunSQL(
+            sql='DROP INDEX IF EXISTS recipes_recipe_tags_tag_id_6fe328c4;',
+            reverse_sql=(
+                'CREATE INDEX recipes_recipe_tags_tag_id_6fe328c4 '
+                'ON recipes_recipe_tags (tag_id);'
+            ),
+        ),
+    ]
@@ -1,7 +1,15 @@
 from django.contrib.auth import get_user_model
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.core.validators import (MaxValueValidator, MinValueValidator,
                                     RegexValidator)
 from django.db import models
+from django.db.models import (BooleanField, Exists, F, OuterRef, Prefetch,
+                              Value, Window)
+from django.db.models.functions import RowNumber
+
+from users.models import CountersMixin, Follow
 
 User = get_user_model()
 
@@ -44,6 +52,12 @@ class Ingredient(models.Model):
     )
 
     class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=('name', 'measurement_unit'),
+                name='unique_ingredient'
+            )
+        ]
         verbose_name = 'Ингредиент'
         verbose_name_plural = 'Ингредиенты'
 
@@ -51,7 +65,61 @@ class Ingredient(models.Model):
         return self.name
 
 
-class Recipe(models.Model):
+class RecipeQuerySet(models.QuerySet):
+    def with_related(self, user=None):
+        if user is not None and user.is_authenticated:
+            is_subscribed = Exists(
+                Follow.objects.filter(user=user, author=OuterRef('pk'))
+            )
+        else:
+            is_subscribed = Value(False, output_field=BooleanField())
+        author_queryset = User.objects.annotate(is_subscribed=is_subscribed)
+        return self.defer('search_vector').prefetch_related(
+            Prefetch('author', queryset=author_queryset),
+            'tags',
+            Prefetch(
+                'ingredients_recipe',
+                queryset=RecipeIngredient.objects.select_related('ingredient')
+            ),
+        )
+
+    def with_user_flags(self, user):
+        if not user.is_authenticated:
+            return self.annotate(
+                is_favorited=Value(False, output_field=BooleanField()),
+                is_in_shopping_cart=Value(False, output_field=BooleanField()),
+            )
+        return self.annotate(
+            is_favorited=Exists(
+                Favorite.objects.filter(user=user, recipe=OuterRef('pk'))
+            ),
+            is_in_shopping_cart=Exists(
+                Cart.objects.filter(user=user, recipe=OuterRef('pk'))
+            ),
+        )
+
+    def latest_by_author(self, author_ids, limit=None):
+        recipes = self.filter(author_id__in=author_ids).order_by(
+            '-pub_date', '-id'
+        )
+        if limit is None:
+            return list(recipes)
+        sql, params = recipes.annotate(
+            row_number=Window(
+                expression=RowNumber(),
+                partition_by=F('author_id'),
+                order_by=(F('pub_date').desc(), F('id').desc()),
+            )
+        ).query.sql_with_params()
+        return list(self.model.objects.raw(
+            f'SELECT * FROM ({sql}) AS ranked '
+            f'WHERE ranked.row_number <= %s '
+            f'ORDER BY ranked.row_number',
+            (*params, limit)
+        ))
+
+
+class Recipe(CountersMixin, models.Model):
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -66,6 +134,11 @@ class Recipe(models.Model):
         upload_to='images/',
         verbose_name='Фото блюда',
     )
+    image_variants = models.JSONField(
+        default=dict,
+        editable=False,
+        verbose_name='Уменьшенные копии фото',
+    )
     text = models.TextField(
         verbose_name='Описание'
     )
@@ -93,11 +166,56 @@ class Recipe(models.Model):
         verbose_name='Дата публикации',
         auto_now_add=True,
     )
+    modified = models.DateTimeField(
+        verbose_name='Дата изменения',
+        auto_now=True,
+    )
+    favorites_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='В избранном',
+    )
+    carts_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='В списках покупок',
+    )
+    search_vector = SearchVectorField(
+        null=True,
+        editable=False,
+        verbose_name='Поисковый вектор',
+    )
+    trending_score = models.FloatField(
+        default=0,
+        editable=False,
+        verbose_name='Популярность',
+    )
+
+    objects = RecipeQuerySet.as_manager()
+    counter_fields = ('favorites_count', 'carts_count', 'trending_score')
 
     class Meta:
         verbose_name = 'Рецепт'
         verbose_name_plural = 'Рецепты'
         ordering = ('-pub_date',)
+        indexes = [
+            models.Index(
+                fields=('-pub_date', '-id'),
+                name='recipe_pub_date_id_idx',
+            ),
+            models.Index(
+                fields=('author', '-pub_date', '-id'),
+                name='recipe_author_pub_date_idx',
+            ),
+            models.Index(
+                fields=('-trending_score', '-id'),
+                name='recipe_trending_idx',
+            ),
+            GinIndex(
+                fields=('search_vector',),
+                name='recipe_search_vector_idx',
+            ),
+        ]
 
     def __str__(self):
         return self.name
@@ -139,14 +257,20 @@ class Favorite(models.Model):
         Recipe,
         related_name='favorites',
         on_delete=models.CASCADE,
+        db_index=False,
         verbose_name='Рецепт'
     )
     user = models.ForeignKey(
         User,
         related_name='favorites',
         on_delete=models.CASCADE,
+        db_index=False,
         verbose_name='Пользователь'
     )
+    created = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Дата добавления'
+    )
 
     class Meta:
         constraints = [
@@ -155,6 +279,16 @@ class Favorite(models.Model):
                 name='unique_item_in_favorite'
             )
         ]
+        indexes = [
+            models.Index(
+                fields=('recipe', 'user'),
+                name='favorite_recipe_user_idx',
+            ),
+            models.Index(
+                fields=('created',),
+                name='favorite_created_idx',
+            ),
+        ]
         verbose_name = 'Избранное'
         verbose_name_plural = 'Избранное'
 
@@ -167,14 +301,20 @@ class Cart(models.Model):
         Recipe,
         related_name='carts',
         on_delete=models.CASCADE,
+        db_index=False,
         verbose_name='Рецепт'
     )
     user = models.ForeignKey(
         User,
         related_name='carts',
         on_delete=models.CASCADE,
+        db_index=False,
         verbose_name='Пользователь'
     )
+    created = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Дата добавления'
+    )
 
     class Meta:
         constraints = [
@@ -183,8 +323,81 @@ class Cart(models.Model):
                 name='unique_item_in_cart'
             )
         ]
+        indexes = [
+            models.Index(
+                fields=('recipe', 'user'),
+                name='cart_recipe_user_idx',
+            ),
+            models.Index(
+                fields=('created',),
+                name='cart_created_idx',
+            ),
+        ]
         verbose_name = 'Список покупок'
         verbose_name_plural = 'Список покупок'
 
     def __str__(self):
         return f'{self.user} добавил рецепт {self.recipe}'
+
+
+class RecipeSimilarity(models.Model):
+    recipe = models.OneToOneField(
+        Recipe,
+        primary_key=True,
+        related_name='similarity',
+        on_delete=models.CASCADE,
+        verbose_name='Рецепт'
+    )
+    similar_ids = ArrayField(
+        models.BigIntegerField(),
+        default=list,
+        verbose_name='Похожие рецепты'
+    )
+    scores = ArrayField(
+        models.FloatField(),
+        default=list,
+        verbose_name='Сходство'
+    )
+    updated = models.DateTimeField(verbose_name='Дата расчета')
+
+    class Meta:
+        indexes = [
+            GinIndex(
+                fields=('similar_ids',),
+                name='recipe_similar_ids_idx',
+            ),
+        ]
+        verbose_name = 'Похожие рецепты'
+        verbose_name_plural = 'Похожие рецепты'
+
+    def __str__(self):
+        return f'Похожие на {self.recipe}'
+
+
+class ShoppingListItem(models.Model):
+    user = models.ForeignKey(
+        User,
+        related_name='shopping_list',
+        on_delete=models.CASCADE,
+        verbose_name='Пользователь'
+    )
+    ingredient = models.ForeignKey(
+        Ingredient,
+        related_name='shopping_list_items',
+        on_delete=models.CASCADE,
+        verbose_name='Ингредиент'
+    )
+    amount = models.PositiveIntegerField(verbose_name='Кол-во')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=('user', 'ingredient'),
+                name='unique_shopping_list_item'
+            )
+        ]
+        verbose_name = 'Позиция списка покупок'
+        verbose_name_plural = 'Позиции списка покупок'
+
+    def __str__(self):
+        return f'{self.ingredient} для {self.user}: {self.amount}'
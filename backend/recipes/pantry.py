@@ -0,0 +1,164 @@
+import bisect
+import heapq
+import threading
+import time
+from array import array
+from collections import Counter, defaultdict
+from itertools import islice
+
+from django.core.cache import cache
+from django.db import transaction
+
+from recipes.cache import get_version
+from recipes.models import RecipeIngredient
+
+PANTRY_VERSION_KEY = 'version:pantry'
+PANTRY_CHANGE_KEY = 'pantry-change:{}'
+PANTRY_CHANGE_TIMEOUT = 86400
+MAX_PENDING_CHANGES = 1000
+QUERY_CHUNK_SIZE = 10000
+SIZE_SHIFT = 40
+RECIPE_MASK = (1 << SIZE_SHIFT) - 1
+
+
+def make_key(size, recipe_id):
+    return size << SIZE_SHIFT | recipe_id
+
+
+def get_rank(match):
+    recipe_id, available, missing = match
+    return -available / (available + missing), missing, -recipe_id
+
+
+class PantryMatches:
+    def __init__(self, counts, max_missing):
+        self.matches = [
+            (key & RECIPE_MASK, available, missing)
+            for key, available, missing in (
+                (key, available, (key >> SIZE_SHIFT) - available)
+                for key, available in counts.items()
+            )
+            if max_missing is None or missing <= max_missing
+        ]
+
+    def __len__(self):
+        return len(self.matches)
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        start, stop, _ = index.indices(len(self.matches))
+        return heapq.nsmallest(stop, self.matches, key=get_rank)[start:]
+
+
+class PantryIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._postings = {}
+
+    def _build(self, version):
+        recipes = defaultdict(list)
+        sizes = Counter()
+        rows = (
+            RecipeIngredient.objects
+            .values_list('ingredient_id', 'recipe_id')
+            .iterator(chunk_size=QUERY_CHUNK_SIZE)
+        )
+        for ingredient_id, recipe_id in rows:
+            recipes[ingredient_id].append(recipe_id)
+            sizes[recipe_id] += 1
+        self._postings = {
+            ingredient_id: array('q', sorted(
+                make_key(sizes[recipe_id], recipe_id)
+                for recipe_id in recipe_ids
+            ))
+            for ingredient_id, recipe_ids in recipes.items()
+        }
+        self._version = version
+
+    def _apply(self, changes):
+        for recipe_id, old_ids, new_ids in changes:
+            old_key = make_key(len(old_ids), recipe_id)
+            for ingredient_id in old_ids:
+                keys = self._postings.get(ingredient_id, ())
+                position = bisect.bisect_left(keys, old_key)
+                if position < len(keys) and keys[position] == old_key:
+                    keys.pop(position)
+            new_key = make_key(len(new_ids), recipe_id)
+            for ingredient_id in new_ids:
+                keys = self._postings.setdefault(ingredient_id, array('q'))
+                position = bisect.bisect_left(keys, new_key)
+                if position == len(keys) or keys[position] != new_key:
+                    keys.insert(position, new_key)
+
+    def sync(self):
+        version = get_version(PANTRY_VERSION_KEY)
+        if version == self._version:
+            return
+        with self._lock:
+            if version == self._version:
+                return
+            if (
+                self._version is not None
+                and 0 < version - self._version <= MAX_PENDING_CHANGES
+            ):
+                keys = [
+                    PANTRY_CHANGE_KEY.format(number)
+                    for number in range(self._version + 1, version + 1)
+                ]
+                changes = cache.get_many(keys)
+                if len(changes) == len(keys):
+                    self._apply(changes[key] for key in keys)
+                    self._version = version
+                    return
+            self._build(version)
+
+    def find(self, ingredient_ids, max_missing=None):
+        self.sync()
+        ingredient_ids = set(ingredient_ids)
+        postings = self._postings
+        counts = Counter()
+        for ingredient_id in ingredient_ids:
+            keys = postings.get(ingredient_id, ())
+            if max_missing is not None:
+                keys = islice(keys, bisect.bisect_left(
+                    keys, make_key(len(ingredient_ids) + max_missing + 1, 0)
+                ))
+            counts.update(keys)
+        return PantryMatches(counts, max_missing)
+
+
+pantry_index = PantryIndex()
+
+
+def _record_change(recipe_id, old_ids, new_ids):
+    try:
+        version = cache.incr(PANTRY_VERSION_KEY)
+    except ValueError:
+        cache.add(PANTRY_VERSION_KEY, time.time_ns(), timeout=None)
+        return
+    cache.set(
+        PANTRY_CHANGE_KEY.format(version),
+        (recipe_id, tuple(old_ids), tuple(new_ids)),
+        timeout=PANTRY_CHANGE_TIMEOUT,
+    )
+
+
+def get_ingredient_ids(recipe_id):
+    return list(
+        RecipeIngredient.objects.filter(recipe_id=recipe_id)
+        .values_list('ingredient_id', flat=True)
+    )
+
+
+def record_change(recipe_id, old_ids, new_ids):
+    old_ids, new_ids = sorted(old_ids), sorted(new_ids)
+    if old_ids != new_ids:
+        transaction.on_commit(
+            lambda: _record_change(recipe_id, old_ids, new_ids)
+        )
+
+
+def find_pantry_recipes(ingredients, max_missing=None):
+    return pantry_index.find(ingredients, max_missing)
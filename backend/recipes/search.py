@@ -0,0 +1,149 @@
+import bisect
+import heapq
+import threading
+
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connection
+from django.db.models import Case, F, IntegerField, Value, When
+from django.db.models.functions import Collate, Lower
+
+from recipes.cache import ingredient_cache
+from recipes.models import Ingredient
+
+RECIPE_SEARCH_CONFIG = 'russian'
+
+UPDATE_RECIPE_SEARCH_VECTORS_SQL = f'''
+    UPDATE recipes_recipe AS recipe
+    SET search_vector =
+        setweight(to_tsvector('{RECIPE_SEARCH_CONFIG}', recipe.name), 'A')
+        || setweight(to_tsvector('{RECIPE_SEARCH_CONFIG}', COALESCE((
+            SELECT string_agg(ingredient.name, ' ')
+            FROM recipes_recipeingredient AS item
+            JOIN recipes_ingredient AS ingredient
+                ON ingredient.id = item.ingredient_id
+            WHERE item.recipe_id = recipe.id
+        ), '')), 'B')
+        || setweight(to_tsvector('{RECIPE_SEARCH_CONFIG}', recipe.text), 'C')
+'''
+
+
+def get_ingredient_key(ingredient):
+    return (
+        ingredient.name.lower(), ingredient.measurement_unit, ingredient.pk
+    )
+
+
+class IngredientIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._source = None
+        self._keys = []
+        self._suffixes = []
+        self._ingredients = []
+
+    def invalidate(self):
+        self._source = None
+
+    def _build(self, source):
+        with self._lock:
+            if source is self._source:
+                return
+            ingredients = sorted(source, key=get_ingredient_key)
+            self._keys = [
+                ingredient.name.lower() for ingredient in ingredients
+            ]
+            self._suffixes = sorted(
+                (key[offset:], position)
+                for position, key in enumerate(self._keys)
+                for offset in range(1, len(key))
+            )
+            self._ingredients = ingredients
+            self._source = source
+
+    def search(self, query, limit):
+        source = ingredient_cache.get_instances()
+        if source is not self._source:
+            self._build(source)
+        keys, suffixes = self._keys, self._suffixes
+        ingredients = self._ingredients
+        query = query.lower()
+        start = bisect.bisect_left(keys, query)
+        end = start
+        while end < len(keys) and end - start < limit:
+            if not keys[end].startswith(query):
+                break
+            end += 1
+        result = ingredients[start:end]
+        if len(result) >= limit:
+            return result
+        positions = set()
+        index = bisect.bisect_left(suffixes, (query,))
+        while index < len(suffixes) and suffixes[index][0].startswith(query):
+            position = suffixes[index][1]
+            if not keys[position].startswith(query):
+                positions.add(position)
+            index += 1
+        return result + [
+            ingredients[position]
+            for position in heapq.nsmallest(limit - len(result), positions)
+        ]
+
+
+ingredient_index = IngredientIndex()
+
+
+def search_ingredients_in_memory(query, limit):
+    return ingredient_index.search(query, limit)
+
+
+def search_ingredients_in_database(query, limit):
+    return list(
+        Ingredient.objects
+        .filter(name__icontains=query)
+        .annotate(rank=Case(
+            When(name__istartswith=query, then=Value(0)),
+            default=Value(1),
+            output_field=IntegerField(),
+        ))
+        .order_by(
+            'rank',
+            Collate(Lower('name'), 'C'),
+            Collate('measurement_unit', 'C'),
+            'pk',
+        )[:limit]
+    )
+
+
+SEARCH_BACKENDS = {
+    'memory': search_ingredients_in_memory,
+    'database': search_ingredients_in_database,
+}
+
+
+def search_ingredients(query, limit=None):
+    if limit is None:
+        limit = settings.INGREDIENT_SEARCH_LIMIT
+    backend = SEARCH_BACKENDS[settings.INGREDIENT_SEARCH_BACKEND]
+    return backend(query, limit)
+
+
+def update_recipe_search_vectors(recipe_ids=None):
+    sql = UPDATE_RECIPE_SEARCH_VECTORS_SQL
+    params = []
+    if recipe_ids is not None:
+        sql += ' WHERE recipe.id = ANY(%s::bigint[])'
+        params.append(list(recipe_ids))
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+
+
+def search_recipes(queryset, query):
+    search_query = SearchQuery(
+        query, config=RECIPE_SEARCH_CONFIG, search_type='websearch'
+    )
+    return (
+        queryset.filter(search_vector=search_query)
+        .annotate(search_rank=SearchRank(F('search_vector'), search_query))
+        .order_by('-search_rank', '-pub_date', '-id')
+    )
@@ -0,0 +1,141 @@
+from django.db import connection
+from django.db.models import Sum
+
+from recipes.models import Cart, RecipeIngredient, ShoppingListItem
+
+ITEMS_TABLE = ShoppingListItem._meta.db_table
+CART_TABLE = Cart._meta.db_table
+RECIPE_INGREDIENT_TABLE = RecipeIngredient._meta.db_table
+
+ADD_SQL = f'''
+    INSERT INTO {ITEMS_TABLE} (user_id, ingredient_id, amount)
+    SELECT users.user_id, deltas.ingredient_id, deltas.amount
+    FROM unnest(%s::bigint[]) AS users(user_id)
+    CROSS JOIN unnest(%s::bigint[], %s::integer[])
+        AS deltas(ingredient_id, amount)
+    ON CONFLICT (user_id, ingredient_id)
+    DO UPDATE SET amount = {ITEMS_TABLE}.amount + EXCLUDED.amount
+'''
+
+SUBTRACT_SQL = f'''
+    UPDATE {ITEMS_TABLE} AS item
+    SET amount = GREATEST(item.amount - deltas.amount, 0)
+    FROM unnest(%s::bigint[], %s::integer[])
+        AS deltas(ingredient_id, amount)
+    WHERE item.user_id = ANY(%s::bigint[])
+        AND item.ingredient_id = deltas.ingredient_id
+'''
+
+EXPECTED_SQL = f'''
+    SELECT cart.user_id, recipe_ingredient.ingredient_id,
+        SUM(recipe_ingredient.amount) AS amount
+    FROM {CART_TABLE} AS cart
+    JOIN {RECIPE_INGREDIENT_TABLE} AS recipe_ingredient
+        ON recipe_ingredient.recipe_id = cart.recipe_id
+    GROUP BY cart.user_id, recipe_ingredient.ingredient_id
+'''
+
+DIFF_SQL = f'''
+    SELECT COALESCE(expected.user_id, item.user_id),
+        COALESCE(expected.ingredient_id, item.ingredient_id),
+        item.amount, expected.amount
+    FROM ({EXPECTED_SQL}) AS expected
+    FULL OUTER JOIN {ITEMS_TABLE} AS item
+        ON item.user_id = expected.user_id
+        AND item.ingredient_id = expected.ingredient_id
+    WHERE item.amount IS DISTINCT FROM expected.amount
+    ORDER BY 1, 2
+'''
+
+REBUILD_SQL = f'''
+    INSERT INTO {ITEMS_TABLE} (user_id, ingredient_id, amount)
+    {EXPECTED_SQL}
+'''
+
+
+def apply_deltas(user_ids, deltas):
+    user_ids = list(user_ids)
+    if not user_ids:
+        return
+    added = [(pk, amount) for pk, amount in deltas.items() if amount > 0]
+    removed = [(pk, -amount) for pk, amount in deltas.items() if amount < 0]
+    with connection.cursor() as cursor:
+        if added:
+            ingredient_ids, amounts = zip(*added)
+            cursor.execute(
+                ADD_SQL, (user_ids, list(ingredient_ids), list(amounts))
+            )
+        if removed:
+            ingredient_ids, amounts = zip(*removed)
+            cursor.execute(
+                SUBTRACT_SQL, (list(ingredient_ids), list(amounts), user_ids)
+            )
+    if removed:
+        ShoppingListItem.objects.filter(
+            user_id__in=user_ids, amount=0
+        ).delete()
+
+
+def add_recipes(user_id, recipe_ids, sign=1):
+    deltas = dict(
+        RecipeIngredient.objects
+        .filter(recipe_id__in=recipe_ids)
+        .order_by()
+        .values('ingredient_id')
+        .annotate(total=sign * Sum('amount'))
+        .values_list('ingredient_id', 'total')
+    )
+    apply_deltas([user_id], deltas)
+
+
+def remove_recipes(user_id, recipe_ids):
+    add_recipes(user_id, recipe_ids, sign=-1)
+
+
+def add_recipe(user_id, recipe_id):
+    add_recipes(user_id, [recipe_id])
+
+
+def remove_recipe(user_id, recipe_id):
+    remove_recipes(user_id, [recipe_id])
+
+
+def change_recipe(recipe_id, old_amounts, new_amounts):
+    deltas = {
+        ingredient_id: (
+            new_amounts.get(ingredient_id, 0)
+            - old_amounts.get(ingredient_id, 0)
+        )
+        for ingredient_id in old_amounts.keys() | new_amounts.keys()
+    }
+    deltas = {pk: delta for pk, delta in deltas.items() if delta}
+    if deltas:
+        apply_deltas(
+            Cart.objects.filter(recipe_id=recipe_id).values_list(
+                'user_id', flat=True
+            ),
+            deltas
+        )
+
+
+def change_recipe_ingredient(old_row, new_row):
+    rows = [row for row in (old_row, new_row) if row is not None]
+    for recipe_id in {recipe_id for recipe_id, _, _ in rows}:
+        old_amounts, new_amounts = (
+            {row[1]: row[2]} if row is not None and row[0] == recipe_id
+            else {}
+            for row in (old_row, new_row)
+        )
+        change_recipe(recipe_id, old_amounts, new_amounts)
+
+
+def diff():
+    with connection.cursor() as cursor:
+        cursor.execute(DIFF_SQL)
+        return cursor.fetchall()
+
+
+def rebuild():
+    ShoppingListItem.objects.all().delete()
+    with connection.cursor() as cursor:
+        cursor.execute(REBUILD_SQL)
@@ -0,0 +1,189 @@
+from functools import partial
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_delete, pre_save)
+from django.dispatch import receiver
+
+from recipes import feed, images, pantry, shopping_list
+from recipes.cache import (RECIPES_VERSION_KEY, bump_user_state_version,
+                           bump_version, ingredient_cache, tag_cache)
+from recipes.counters import increment
+from recipes.models import (Cart, Favorite, Ingredient, Recipe,
+                            RecipeIngredient, Tag)
+from recipes.search import update_recipe_search_vectors
+from recipes.tasks import enqueue
+
+User = get_user_model()
+
+
+@receiver((post_save, post_delete), sender=Ingredient)
+def invalidate_ingredient_cache(**kwargs):
+    ingredient_cache.invalidate()
+
+
+@receiver((post_save, post_delete), sender=Tag)
+def invalidate_tag_cache(**kwargs):
+    tag_cache.invalidate()
+
+
+@receiver((post_save, post_delete), sender=Recipe)
+@receiver((post_save, post_delete), sender=RecipeIngredient)
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def invalidate_recipes(**kwargs):
+    bump_version(RECIPES_VERSION_KEY)
+
+
+@receiver((post_save, post_delete), sender=Favorite)
+@receiver((post_save, post_delete), sender=Cart)
+def invalidate_user_state(instance, **kwargs):
+    bump_user_state_version(instance.user_id)
+
+
+@receiver(post_save, sender=Recipe)
+def increment_recipes_count(instance, created, **kwargs):
+    if created:
+        increment(User.objects.filter(pk=instance.author_id), 'recipes_count')
+
+
+@receiver(post_save, sender=Recipe)
+def add_to_feeds(instance, created, **kwargs):
+    if created:
+        enqueue(feed.invalidate_followers, instance.author_id)
+
+
+@receiver(post_delete, sender=Recipe)
+def remove_from_feeds(instance, **kwargs):
+    enqueue(feed.invalidate_followers, instance.author_id)
+
+
+@receiver(post_save, sender=Recipe)
+def process_image(instance, **kwargs):
+    if images.needs_processing(instance):
+        enqueue(images.process_recipe_image, instance.pk, instance.image.name)
+
+
+def schedule_search_update(recipe_ids):
+    transaction.on_commit(partial(update_recipe_search_vectors, recipe_ids))
+
+
+@receiver(post_save, sender=Recipe)
+def update_search_vector(instance, **kwargs):
+    schedule_search_update([instance.pk])
+
+
+@receiver((post_save, post_delete), sender=RecipeIngredient)
+def update_recipe_ingredients_search_vector(instance, **kwargs):
+    schedule_search_update([instance.recipe_id])
+
+
+@receiver(post_save, sender=Ingredient)
+def update_ingredient_recipes_search_vectors(instance, created, **kwargs):
+    if not created:
+        schedule_search_update(list(
+            RecipeIngredient.objects.filter(ingredient=instance)
+            .values_list('recipe_id', flat=True).distinct()
+        ))
+
+
+@receiver(post_delete, sender=Recipe)
+def decrement_recipes_count(instance, **kwargs):
+    increment(
+        User.objects.filter(pk=instance.author_id), 'recipes_count', -1
+    )
+
+
+@receiver(post_save, sender=Favorite)
+def increment_favorites_count(instance, created, **kwargs):
+    if created:
+        increment(
+            Recipe.objects.filter(pk=instance.recipe_id), 'favorites_count'
+        )
+
+
+@receiver(post_delete, sender=Favorite)
+def decrement_favorites_count(instance, **kwargs):
+    increment(
+        Recipe.objects.filter(pk=instance.recipe_id), 'favorites_count', -1
+    )
+
+
+@receiver(post_save, sender=Cart)
+def increment_carts_count(instance, created, **kwargs):
+    if created:
+        increment(Recipe.objects.filter(pk=instance.recipe_id), 'carts_count')
+
+
+@receiver(post_delete, sender=Cart)
+def decrement_carts_count(instance, **kwargs):
+    increment(
+        Recipe.objects.filter(pk=instance.recipe_id), 'carts_count', -1
+    )
+
+
+@receiver(post_save, sender=Cart)
+def add_to_shopping_list(instance, created, **kwargs):
+    if created:
+        shopping_list.add_recipe(instance.user_id, instance.recipe_id)
+
+
+@receiver(post_delete, sender=Cart)
+def remove_from_shopping_list(instance, **kwargs):
+    shopping_list.remove_recipe(instance.user_id, instance.recipe_id)
+
+
+def get_recipe_ingredient_row(instance):
+    return instance.recipe_id, instance.ingredient_id, instance.amount
+
+
+def remember_pantry_ingredients(instance, recipe_ids):
+    instance.saved_ingredients = {
+        recipe_id: pantry.get_ingredient_ids(recipe_id)
+        for recipe_id in recipe_ids
+    }
+
+
+def record_pantry_changes(instance):
+    for recipe_id, old_ids in instance.saved_ingredients.items():
+        pantry.record_change(
+            recipe_id, old_ids, pantry.get_ingredient_ids(recipe_id)
+        )
+
+
+@receiver(pre_save, sender=RecipeIngredient)
+def remember_recipe_ingredient(instance, raw, **kwargs):
+    instance.saved_row = None
+    if raw:
+        return
+    if instance.pk is not None:
+        instance.saved_row = (
+            RecipeIngredient.objects.filter(pk=instance.pk)
+            .values_list('recipe_id', 'ingredient_id', 'amount').first()
+        )
+    recipe_ids = {instance.recipe_id}
+    if instance.saved_row is not None:
+        recipe_ids.add(instance.saved_row[0])
+    remember_pantry_ingredients(instance, recipe_ids)
+
+
+@receiver(post_save, sender=RecipeIngredient)
+def update_recipe_ingredient_indexes(instance, raw, **kwargs):
+    if not raw:
+        shopping_list.change_recipe_ingredient(
+            instance.saved_row, get_recipe_ingredient_row(instance)
+        )
+        record_pantry_changes(instance)
+
+
+@receiver(pre_delete, sender=RecipeIngredient)
+def remember_deleted_recipe_ingredient(instance, **kwargs):
+    remember_pantry_ingredients(instance, {instance.recipe_id})
+
+
+@receiver(post_delete, sender=RecipeIngredient)
+def remove_from_recipe_ingredient_indexes(instance, **kwargs):
+    shopping_list.change_recipe_ingredient(
+        get_recipe_ingredient_row(instance), None
+    )
+    record_pantry_changes(instance)
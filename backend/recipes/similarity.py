@@ -0,0 +1,343 @@
+import heapq
+import math
+from array import array
+from collections import defaultdict
+from itertools import islice
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from recipes.models import Recipe, RecipeIngredient, RecipeSimilarity
+
+try:
+    import numpy
+    from scipy import sparse
+except ImportError:
+    numpy = sparse = None
+
+TAG_WEIGHT = 0.5
+SCORE_PRECISION = 12
+QUERY_CHUNK_SIZE = 10000
+
+
+FEATURE_SOURCES = (
+    (RecipeIngredient, 'ingredient_id', 'ingredient', 1.0),
+    (Recipe.tags.through, 'tag_id', 'tag', TAG_WEIGHT),
+)
+
+
+def load_recipe_ids():
+    return (
+        Recipe.objects.order_by('pk').values_list('pk', flat=True)
+        .iterator(chunk_size=QUERY_CHUNK_SIZE)
+    )
+
+
+def load_features():
+    recipe_ids = array('q', load_recipe_ids())
+    positions = {
+        recipe_id: position for position, recipe_id in enumerate(recipe_ids)
+    }
+    rows, columns, weights = array('q'), array('q'), array('d')
+    features = {}
+    candidate_features = 0
+    for model, field, kind, weight in FEATURE_SOURCES:
+        queryset = model.objects.values_list('recipe_id', field)
+        for recipe_id, value in queryset.iterator(chunk_size=QUERY_CHUNK_SIZE):
+            row = positions.get(recipe_id)
+            if row is None:
+                continue
+            rows.append(row)
+            columns.append(features.setdefault((kind, value), len(features)))
+            weights.append(weight)
+        if kind == 'ingredient':
+            candidate_features = len(features)
+    frequencies = [0] * len(features)
+    for column in columns:
+        frequencies[column] += 1
+    inverse = [
+        math.log(1 + len(recipe_ids) / frequency) for frequency in frequencies
+    ]
+    norms = [0.0] * len(recipe_ids)
+    for number, (row, column) in enumerate(zip(rows, columns)):
+        weights[number] *= inverse[column]
+        norms[row] += weights[number] ** 2
+    for number, row in enumerate(rows):
+        weights[number] /= math.sqrt(norms[row])
+    return (
+        recipe_ids, rows, columns, weights, len(features), candidate_features
+    )
+
+
+def iter_batches(queryset):
+    rows = queryset.iterator(chunk_size=QUERY_CHUNK_SIZE)
+    while True:
+        batch = list(islice(rows, QUERY_CHUNK_SIZE))
+        if not batch:
+            return
+        yield numpy.array(batch, dtype=numpy.int64)
+
+
+class SparseSimilarity:
+    def __init__(self, recipe_ids, candidates, extra):
+        self.recipe_ids = recipe_ids
+        self.candidates = candidates
+        self.transposed = candidates.T.tocsr()
+        self.extra = extra
+        frequencies = numpy.diff(self.transposed.indptr)
+        self.costs = numpy.minimum(
+            numpy.bincount(
+                numpy.repeat(
+                    numpy.arange(len(recipe_ids)),
+                    numpy.diff(self.candidates.indptr),
+                ),
+                weights=frequencies[self.candidates.indices],
+                minlength=len(recipe_ids),
+            ),
+            len(recipe_ids),
+        )
+
+    @classmethod
+    def from_features(cls, recipe_ids, rows, columns, weights, features,
+                      candidate_features):
+        matrix = sparse.csr_matrix(
+            (
+                numpy.frombuffer(weights, dtype=numpy.float64),
+                (
+                    numpy.frombuffer(rows, dtype=numpy.int64),
+                    numpy.frombuffer(columns, dtype=numpy.int64),
+                ),
+            ),
+            shape=(len(recipe_ids), features),
+        )
+        return cls(
+            numpy.frombuffer(recipe_ids, dtype=numpy.int64),
+            matrix[:, :candidate_features].tocsr(),
+            matrix[:, candidate_features:].tocsr(),
+        )
+
+    @classmethod
+    def from_database(cls):
+        recipe_ids = numpy.fromiter(load_recipe_ids(), dtype=numpy.int64)
+        sources = [
+            load_sparse_source(
+                recipe_ids, model.objects.values_list('recipe_id', field),
+                weight,
+            )
+            for model, field, _, weight in FEATURE_SOURCES
+        ]
+        norms = sum(
+            numpy.bincount(rows, weights=data ** 2, minlength=len(recipe_ids))
+            for rows, _, data, _ in sources
+        )
+        return cls(recipe_ids, *(
+            sparse.csr_matrix(
+                (data / numpy.sqrt(norms[rows]), (rows, columns)),
+                shape=(len(recipe_ids), features),
+            )
+            for rows, columns, data, features in sources
+        ))
+
+    def split(self, positions, max_products):
+        chunk, products = [], 0
+        for position in positions:
+            cost = self.costs[position]
+            if chunk and products + cost > max_products:
+                yield chunk
+                chunk, products = [], 0
+            chunk.append(position)
+            products += cost
+        if chunk:
+            yield chunk
+
+    def neighbours(self, positions, count):
+        for chunk in self.split(
+            positions, settings.SIMILAR_RECIPES_MAX_PRODUCTS
+        ):
+            yield from self.chunk_neighbours(chunk, count)
+
+    def chunk_neighbours(self, positions, count):
+        products = (self.candidates[positions] @ self.transposed).tocsr()
+        if self.extra.nnz:
+            owners = numpy.repeat(
+                numpy.arange(len(positions)), numpy.diff(products.indptr)
+            )
+            products.data += numpy.asarray(
+                self.extra[products.indices]
+                .multiply(self.extra[positions][owners])
+                .sum(axis=1)
+            ).ravel()
+        for number, position in enumerate(positions):
+            start, end = products.indptr[number], products.indptr[number + 1]
+            columns = products.indices[start:end]
+            scores = products.data[start:end]
+            other = columns != position
+            columns = columns[other]
+            scores = numpy.round(scores[other], SCORE_PRECISION)
+            if len(scores) > count:
+                threshold = numpy.partition(scores, -count)[-count]
+                top = scores >= threshold
+                columns, scores = columns[top], scores[top]
+            order = numpy.lexsort((columns, -scores))[:count]
+            yield (
+                position,
+                self.recipe_ids[columns[order]].tolist(),
+                scores[order].tolist(),
+            )
+
+
+def load_sparse_source(recipe_ids, queryset, weight):
+    rows, values = [numpy.empty(0, numpy.int32)], [numpy.empty(0, numpy.int64)]
+    for batch in iter_batches(queryset):
+        positions = numpy.searchsorted(recipe_ids, batch[:, 0])
+        found = positions < len(recipe_ids)
+        found[found] = recipe_ids[positions[found]] == batch[found, 0]
+        rows.append(positions[found].astype(numpy.int32))
+        values.append(batch[found, 1])
+    rows = numpy.concatenate(rows)
+    features, columns = numpy.unique(
+        numpy.concatenate(values), return_inverse=True
+    )
+    columns = columns.astype(numpy.int32).ravel()
+    frequencies = numpy.bincount(columns, minlength=len(features))
+    inverse = numpy.log(1 + len(recipe_ids) / numpy.maximum(frequencies, 1))
+    return rows, columns, weight * inverse[columns], len(features)
+
+
+class PythonSimilarity:
+    def __init__(self, recipe_ids, rows, columns, weights, features,
+                 candidate_features):
+        self.recipe_ids = recipe_ids
+        self.vectors = [[] for _ in recipe_ids]
+        self.extra = [{} for _ in recipe_ids]
+        self.postings = [[] for _ in range(candidate_features)]
+        for row, column, weight in zip(rows, columns, weights):
+            if column < candidate_features:
+                self.vectors[row].append((column, weight))
+                self.postings[column].append((row, weight))
+            else:
+                self.extra[row][column] = weight
+
+    @classmethod
+    def from_database(cls):
+        return cls(*load_features())
+
+    def neighbours(self, positions, count):
+        for position in positions:
+            scores = defaultdict(float)
+            for column, weight in self.vectors[position]:
+                for other, other_weight in self.postings[column]:
+                    scores[other] += weight * other_weight
+            scores.pop(position, None)
+            extra = self.extra[position]
+            for other in scores:
+                other_extra = self.extra[other]
+                scores[other] += sum(
+                    weight * other_extra.get(column, 0)
+                    for column, weight in extra.items()
+                )
+            top = heapq.nlargest(
+                count,
+                (
+                    (round(score, SCORE_PRECISION), other)
+                    for other, score in scores.items()
+                ),
+                key=lambda item: (item[0], -item[1]),
+            )
+            yield (
+                position,
+                [self.recipe_ids[other] for _, other in top],
+                [score for score, _ in top],
+            )
+
+
+ENGINES = {
+    'scipy': SparseSimilarity,
+    'python': PythonSimilarity,
+}
+
+
+def build_engine(backend='auto'):
+    if backend == 'auto':
+        backend = 'python' if sparse is None else 'scipy'
+    if backend == 'scipy' and sparse is None:
+        raise ImproperlyConfigured('Для движка scipy нужны numpy и scipy.')
+    return ENGINES[backend].from_database()
+
+
+def store_neighbours(engine, positions, count, chunk_size, updated):
+    for start in range(0, len(positions), chunk_size):
+        objects = [
+            RecipeSimilarity(
+                recipe_id=int(engine.recipe_ids[position]),
+                similar_ids=similar_ids,
+                scores=scores,
+                updated=updated,
+            )
+            for position, similar_ids, scores in engine.neighbours(
+                positions[start:start + chunk_size], count
+            )
+        ]
+        with transaction.atomic():
+            RecipeSimilarity.objects.filter(
+                recipe_id__in=[item.recipe_id for item in objects]
+            ).delete()
+            RecipeSimilarity.objects.bulk_create(objects)
+
+
+def get_touched_recipe_ids():
+    return list(
+        Recipe.objects.filter(
+            Q(similarity__isnull=True)
+            | Q(modified__gt=F('similarity__updated'))
+        ).values_list('pk', flat=True)
+    )
+
+
+def get_affected_recipe_ids(touched):
+    affected = set(
+        RecipeSimilarity.objects.filter(similar_ids__overlap=touched)
+        .values_list('recipe_id', flat=True)
+    )
+    for similar_ids in (
+        RecipeSimilarity.objects.filter(recipe_id__in=touched)
+        .values_list('similar_ids', flat=True)
+    ):
+        affected.update(similar_ids)
+    return affected.difference(touched)
+
+
+def refresh_similar_recipes(full=False, count=None, chunk_size=None,
+                            backend='auto'):
+    count = count or settings.SIMILAR_RECIPES_COUNT
+    chunk_size = chunk_size or settings.SIMILAR_RECIPES_CHUNK_SIZE
+    updated = timezone.now()
+    touched = None if full else get_touched_recipe_ids()
+    if touched == []:
+        return 0
+    engine = build_engine(backend)
+    if touched is None:
+        positions = list(range(len(engine.recipe_ids)))
+        store_neighbours(engine, positions, count, chunk_size, updated)
+        return len(positions)
+    index = {
+        int(recipe_id): position
+        for position, recipe_id in enumerate(engine.recipe_ids)
+    }
+    positions = [index[pk] for pk in touched if pk in index]
+    store_neighbours(engine, positions, count, chunk_size, updated)
+    affected = [
+        index[pk] for pk in get_affected_recipe_ids(touched) if pk in index
+    ]
+    store_neighbours(engine, affected, count, chunk_size, updated)
+    return len(positions) + len(affected)
+
+
+def get_similar_recipe_ids(recipe_id):
+    return (
+        RecipeSimilarity.objects.filter(recipe_id=recipe_id)
+        .values_list('similar_ids', flat=True).first()
+    )
@@ -0,0 +1,43 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connection, transaction
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings.BACKGROUND_WORKERS,
+                    thread_name_prefix='foodgram-background',
+                )
+    return _executor
+
+
+def _run(func, *args):
+    try:
+        func(*args)
+    except Exception:
+        logger.exception('Фоновая задача %s завершилась с ошибкой', func)
+    finally:
+        connection.close()
+
+
+def run_in_background(func, *args):
+    if not settings.BACKGROUND_TASKS_ASYNC:
+        func(*args)
+        return
+    get_executor().submit(_run, func, *args)
+
+
+def enqueue(func, *args):
+    transaction.on_commit(lambda: run_in_background(func, *args))
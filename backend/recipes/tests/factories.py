@@ -0,0 +1,61 @@
+from django.contrib.auth import get_user_model
+from rest_framework.authtoken.models import Token
+
+from recipes.models import Ingredient, Recipe, RecipeIngredient, Tag
+
+User = get_user_model()
+
+
+def create_user(number, token=False):
+    user = User.objects.create_user(
+        email=f'user{number}@example.com',
+        username=f'user{number}',
+        first_name='Имя',
+        last_name='Фамилия',
+        password='password12345',
+    )
+    if token:
+        Token.objects.create(user=user)
+    return user
+
+
+def create_tags(count):
+    return [
+        Tag.objects.create(
+            name=f'Тег {number}', color=f'#0000{number:02d}',
+            slug=f'tag-{number}',
+        )
+        for number in range(count)
+    ]
+
+
+def create_ingredients(count, measurement_unit='г'):
+    return [
+        Ingredient.objects.create(
+            name=f'ингредиент {number}', measurement_unit=measurement_unit
+        )
+        for number in range(count)
+    ]
+
+
+def create_recipe(author, ingredients=(), tags=(), amount=10, **fields):
+    fields.setdefault('name', 'Рецепт')
+    fields.setdefault('text', 'Описание')
+    fields.setdefault('cooking_time', 10)
+    fields.setdefault('image', 'images/recipe.png')
+    recipe = Recipe.objects.create(author=author, **fields)
+    recipe.tags.set(tags)
+    RecipeIngredient.objects.bulk_create(
+        RecipeIngredient(recipe=recipe, ingredient=ingredient, amount=amount)
+        for ingredient in ingredients
+    )
+    return recipe
+
+
+def create_recipes(author, count, ingredients=(), tags=()):
+    return [
+        create_recipe(
+            author, ingredients, tags, name=f'Рецепт {number}'
+        )
+        for number in range(count)
+    ]
@@ -0,0 +1,72 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from recipes import feed
+from recipes.models import Recipe
+from recipes.tests.factories import create_recipe, create_user
+from users.models import Follow
+
+
+@override_settings(BACKGROUND_TASKS_ASYNC=False)
+@mock.patch('recipes.images.needs_processing', return_value=False)
+class FeedCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = create_user(1)
+        self.author = create_user(2)
+        self.other = create_user(3)
+        self.recipe = create_recipe(self.author)
+        create_recipe(self.other)
+        Follow.objects.create(user=self.user, author=self.author)
+
+    def feed_ids(self):
+        return [entry[1] for entry in feed.get_feed(self.user.pk)['entries']]
+
+    def assertChangeDuringRebuildIsKept(self, change):
+        load_entries = feed.load_entries
+
+        def load_then_change(*args):
+            entries = load_entries(*args)
+            with self.captureOnCommitCallbacks(execute=True):
+                change()
+            return entries
+
+        with mock.patch.object(
+            feed, 'load_entries', side_effect=load_then_change
+        ):
+            stale = self.feed_ids()
+        expected = list(
+            feed.filter_feed(Recipe.objects.all(), self.user.pk)
+            .order_by('-pub_date', '-id').values_list('id', flat=True)
+        )
+        self.assertNotEqual(stale, expected)
+        self.assertEqual(self.feed_ids(), expected)
+
+    def test_recipe_added_during_rebuild(self, _):
+        self.assertChangeDuringRebuildIsKept(
+            lambda: create_recipe(self.author)
+        )
+
+    def test_recipe_deleted_during_rebuild(self, _):
+        self.assertChangeDuringRebuildIsKept(self.recipe.delete)
+
+    def test_follow_during_rebuild(self, _):
+        self.assertChangeDuringRebuildIsKept(
+            lambda: Follow.objects.create(user=self.user, author=self.other)
+        )
+
+    def test_unfollow_during_rebuild(self, _):
+        self.assertChangeDuringRebuildIsKept(
+            Follow.objects.filter(user=self.user, author=self.author).delete
+        )
+
+    def test_every_invalidation_bumps_version(self, _):
+        self.feed_ids()
+        key = feed.get_feed_version_key(self.user.pk)
+        version = cache.get(key)
+        feed.invalidate_feeds([self.user.pk])
+        feed.invalidate_feeds([self.user.pk, self.other.pk])
+        self.assertEqual(cache.get(key), version + 2)
+        self.assertIsNone(cache.get(feed.get_feed_version_key(self.other.pk)))
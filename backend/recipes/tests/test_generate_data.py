@@ -0,0 +1,24 @@
+from django.test import TestCase
+
+from recipes.management.commands.generate_data import Command
+from recipes.models import Favorite
+from recipes.tests.factories import create_recipes, create_user
+
+
+class CreateRelationsTests(TestCase):
+    def test_reports_only_inserted_rows(self):
+        users = [create_user(number).pk for number in range(3)]
+        recipes = [
+            recipe.pk for recipe in create_recipes(create_user(3), 2)
+        ]
+        Favorite.objects.bulk_create(
+            Favorite(user_id=user, recipe_id=recipes[0]) for user in users
+        )
+        command = Command()
+        command.batch_size = 2
+        command.options = {'seed': 1, 'skew': 0}
+        created = command.create_relations(
+            Favorite, 'recipe_id', users, recipes, 4
+        )
+        self.assertEqual(created, Favorite.objects.count() - len(users))
+        self.assertLessEqual(created, len(users))
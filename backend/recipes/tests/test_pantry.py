@@ -0,0 +1,173 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from recipes.pantry import PANTRY_VERSION_KEY, PantryIndex, record_change
+from recipes.tests.factories import (create_ingredients, create_recipe,
+                                     create_tags, create_user)
+
+
+class PantryIndexTests(TestCase):
+    def setUp(self):
+        cache.delete(PANTRY_VERSION_KEY)
+        self.author = create_user(1)
+        self.ingredients = create_ingredients(6)
+        first, second, third, fourth, fifth, sixth = self.ingredients
+        self.recipes = [
+            create_recipe(self.author, ingredients)
+            for ingredients in (
+                (first, second),
+                (first, second, third),
+                (first, fourth, fifth, sixth),
+                (third,),
+                (first,),
+            )
+        ]
+        self.index = PantryIndex()
+
+    def ids(self, *numbers):
+        return [self.ingredients[number].pk for number in numbers]
+
+    def find(self, numbers, max_missing=None, index=None):
+        matches = (index or self.index).find(self.ids(*numbers), max_missing)
+        return [
+            (self.recipes.index(recipe), missing)
+            for recipe, missing in (
+                (next(r for r in self.recipes if r.pk == recipe_id), missing)
+                for recipe_id, _, missing in matches[:len(matches)]
+            )
+        ]
+
+    def test_ranking_by_coverage(self):
+        self.assertEqual(
+            self.find((0, 1)),
+            [(4, 0), (0, 0), (1, 1), (2, 3)],
+        )
+
+    def test_max_missing(self):
+        self.assertEqual(self.find((0, 1), max_missing=0), [(4, 0), (0, 0)])
+        self.assertEqual(
+            self.find((0, 1), max_missing=1), [(4, 0), (0, 0), (1, 1)]
+        )
+        self.assertEqual(
+            self.find((0, 3, 4, 5), max_missing=0), [(4, 0), (2, 0)]
+        )
+
+    def test_page_selection(self):
+        matches = self.index.find(self.ids(0, 1))
+        full = matches[:len(matches)]
+        self.assertEqual(len(matches), 4)
+        self.assertEqual(matches[1:3], full[1:3])
+        self.assertEqual(matches[3], full[3])
+        self.assertEqual(matches[10:20], [])
+
+    def test_incremental_changes_match_rebuild(self):
+        self.index.find(self.ids(0))
+        recipe = self.recipes[1]
+        with self.captureOnCommitCallbacks(execute=True):
+            record_change(recipe.pk, self.ids(0, 1, 2), self.ids(1, 5))
+        recipe.ingredients_recipe.exclude(
+            ingredient_id__in=self.ids(1)
+        ).delete()
+        recipe.ingredients_recipe.create(
+            ingredient=self.ingredients[5], amount=1
+        )
+        with mock.patch.object(self.index, '_build') as build:
+            self.assertEqual(self.find((1, 5), max_missing=0), [(1, 0)])
+        build.assert_not_called()
+        for numbers, max_missing in (((0, 1), None), ((1, 5), 0)):
+            self.assertEqual(
+                self.find(numbers, max_missing),
+                self.find(numbers, max_missing, index=PantryIndex()),
+            )
+
+    def test_row_changes_update_index(self):
+        self.index.find(self.ids(0))
+        recipe = self.recipes[1]
+        item = recipe.ingredients_recipe.get(ingredient=self.ingredients[0])
+
+        def move(**fields):
+            for name, value in fields.items():
+                setattr(item, name, value)
+            item.save()
+
+        changes = {
+            'save': item.save,
+            'change_ingredient': lambda: move(ingredient=self.ingredients[5]),
+            'change_recipe': lambda: move(recipe=self.recipes[3]),
+            'create': lambda: recipe.ingredients_recipe.create(
+                ingredient=self.ingredients[4], amount=1
+            ),
+            'delete_rows': recipe.ingredients_recipe.all().delete,
+            'delete_ingredient': self.ingredients[1].delete,
+            'delete_recipe': self.recipes[2].delete,
+        }
+        for name, change in changes.items():
+            with self.subTest(change=name):
+                with self.captureOnCommitCallbacks(execute=True):
+                    change()
+                with mock.patch.object(self.index, '_build') as build:
+                    self.index.sync()
+                build.assert_not_called()
+                fresh = PantryIndex()
+                for numbers in ((0, 1), (2, 3), (4, 5), (0, 3, 4, 5)):
+                    self.assertEqual(
+                        self.index.find(self.ids(*numbers))[:10],
+                        fresh.find(self.ids(*numbers))[:10],
+                    )
+
+    def test_recipe_update_updates_index(self):
+        self.index.find(self.ids(0))
+        recipe = self.recipes[2]
+        client = APIClient()
+        client.force_authenticate(self.author)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = client.patch(
+                f'/api/recipes/{recipe.pk}/',
+                {
+                    'tags': [create_tags(1)[0].pk],
+                    'ingredients': [
+                        {'id': pk, 'amount': 2} for pk in self.ids(0, 1)
+                    ],
+                },
+                format='json',
+            )
+        self.assertEqual(response.status_code, 200, response.data)
+        with mock.patch.object(self.index, '_build') as build:
+            self.assertEqual(
+                self.find((0, 1), max_missing=0), [(4, 0), (2, 0), (0, 0)]
+            )
+        build.assert_not_called()
+        self.assertEqual(self.find((3, 4, 5)), [])
+        self.assertEqual(
+            self.find((0, 1, 3)), self.find((0, 1, 3), index=PantryIndex())
+        )
+
+
+class PantryEndpointTests(TestCase):
+    def test_pagination_and_missing_ingredients(self):
+        cache.delete(PANTRY_VERSION_KEY)
+        author = create_user(1)
+        ingredients = create_ingredients(3)
+        recipes = [
+            create_recipe(author, ingredients[:size], name=f'Рецепт {size}')
+            for size in (1, 2, 3)
+        ]
+        response = APIClient().get('/api/recipes/pantry/', {
+            'ingredients': [ingredients[0].pk], 'limit': 2,
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 3)
+        self.assertEqual(
+            [(item['id'], item['missing_ingredients'])
+             for item in response.data['results']],
+            [(recipes[0].pk, 0), (recipes[1].pk, 1)],
+        )
+        response = APIClient().get(response.data['next'])
+        self.assertEqual(
+            [(item['id'], item['missing_ingredients'])
+             for item in response.data['results']],
+            [(recipes[2].pk, 2)],
+        )
@@ -0,0 +1,43 @@
+from django.core.cache import cache
+from django.test import TestCase
+
+from recipes.models import Ingredient
+from recipes.search import (search_ingredients_in_database,
+                            search_ingredients_in_memory)
+
+
+class IngredientSearchTests(TestCase):
+    def setUp(self):
+        names = (
+            ('Мука', 'г'), ('мука пшеничная', 'г'), ('Мука', 'кг'),
+            ('рисовая мука', 'г'), ('Мускатный орех', 'г'),
+            ('сахар', 'г'), ('Сахарная пудра', 'г'), ('ванильный сахар', 'г'),
+            ('сахар', 'ст. л.'), ('Zucchini', 'шт.'), ('zucchini', 'г'),
+            ('Ёжевика', 'г'), ('ежевика', 'г'),
+        )
+        Ingredient.objects.bulk_create(
+            Ingredient(name=name, measurement_unit=unit)
+            for name, unit in names
+        )
+        cache.clear()
+
+    def test_memory_and_database_order_match(self):
+        for query in ('му', 'Мука', 'сахар', 'ар', 'zuc', 'е', 'а', 'нет'):
+            for limit in (1, 3, 30):
+                with self.subTest(query=query, limit=limit):
+                    self.assertEqual(
+                        search_ingredients_in_memory(query, limit),
+                        search_ingredients_in_database(query, limit),
+                    )
+
+    def test_prefix_matches_come_first(self):
+        self.assertEqual(
+            [
+                (item.name, item.measurement_unit)
+                for item in search_ingredients_in_memory('сахар', 30)
+            ],
+            [
+                ('сахар', 'г'), ('сахар', 'ст. л.'), ('Сахарная пудра', 'г'),
+                ('ванильный сахар', 'г'),
+            ],
+        )
@@ -0,0 +1,72 @@
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from recipes import shopping_list
+from recipes.models import Cart, RecipeIngredient
+from recipes.tests.factories import (create_ingredients, create_recipe,
+                                     create_tags, create_user)
+
+
+class ShoppingListSyncTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = create_user(1, token=True)
+        self.ingredients = create_ingredients(4)
+        self.tags = create_tags(1)
+        self.recipe = create_recipe(
+            self.author, self.ingredients[:3], self.tags
+        )
+        self.other = create_recipe(self.author, self.ingredients[:1])
+        for number in (2, 3):
+            user = create_user(number)
+            Cart.objects.create(user=user, recipe=self.recipe)
+            Cart.objects.create(user=user, recipe=self.other)
+        self.item = self.recipe.ingredients_recipe.get(
+            ingredient=self.ingredients[0]
+        )
+
+    def assertInSync(self):
+        self.assertEqual(shopping_list.diff(), [])
+
+    def test_single_row_changes(self):
+        self.item.amount = 25
+        self.item.save()
+        self.assertInSync()
+        self.item.ingredient = self.ingredients[3]
+        self.item.save()
+        self.assertInSync()
+        self.item.recipe = self.other
+        self.item.save()
+        self.assertInSync()
+        RecipeIngredient.objects.create(
+            recipe=self.recipe, ingredient=self.ingredients[3], amount=7
+        )
+        self.assertInSync()
+        self.item.delete()
+        self.assertInSync()
+
+    def test_cascading_deletes(self):
+        self.ingredients[1].delete()
+        self.assertInSync()
+        self.recipe.delete()
+        self.assertInSync()
+
+    def test_recipe_update(self):
+        client = APIClient()
+        client.credentials(
+            HTTP_AUTHORIZATION=f'Token {self.author.auth_token.key}'
+        )
+        response = client.patch(
+            f'/api/recipes/{self.recipe.pk}/',
+            {
+                'tags': [self.tags[0].pk],
+                'ingredients': [
+                    {'id': self.ingredients[0].pk, 'amount': 3},
+                    {'id': self.ingredients[3].pk, 'amount': 4},
+                ],
+            },
+            format='json',
+        )
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertInSync()
@@ -0,0 +1,106 @@
+import random
+import tracemalloc
+from array import array
+from unittest import mock, skipIf
+
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from recipes.similarity import (PythonSimilarity, SparseSimilarity,
+                                load_features, sparse)
+from recipes.tests.factories import (create_ingredients, create_recipe,
+                                     create_tags, create_user)
+
+
+def make_features(recipes, ingredients, tags):
+    generator = random.Random(1)
+    rows, columns, weights = array('q'), array('q'), array('d')
+    for row in range(recipes):
+        features = [0, *generator.sample(range(1, ingredients), 3)]
+        features.append(ingredients + generator.randrange(tags))
+        for column in features:
+            rows.append(row)
+            columns.append(column)
+            weights.append(0.5 if column >= ingredients else 1.0)
+    return (
+        array('q', range(1, recipes + 1)), rows, columns, weights,
+        ingredients + tags, ingredients,
+    )
+
+
+def get_neighbours(engine, count=5):
+    positions = list(range(len(engine.recipe_ids)))
+    return [
+        (position, list(similar_ids), [round(score, 9) for score in scores])
+        for position, similar_ids, scores in engine.neighbours(
+            positions, count
+        )
+    ]
+
+
+@skipIf(sparse is None, 'numpy and scipy are not installed')
+class SparseSimilarityTests(SimpleTestCase):
+    def test_split_respects_product_budget(self):
+        engine = SparseSimilarity.from_features(*make_features(200, 50, 5))
+        chunks = list(engine.split(list(range(200)), 1000))
+        self.assertEqual(sum(chunks, []), list(range(200)))
+        for chunk in chunks:
+            self.assertTrue(
+                len(chunk) == 1 or engine.costs[chunk].sum() <= 1000
+            )
+
+    def test_small_budget_gives_same_neighbours(self):
+        features = make_features(300, 40, 6)
+        engine = SparseSimilarity.from_features(*features)
+        with override_settings(SIMILAR_RECIPES_MAX_PRODUCTS=10 ** 9):
+            unbounded = get_neighbours(engine)
+        with override_settings(SIMILAR_RECIPES_MAX_PRODUCTS=500):
+            bounded = get_neighbours(engine)
+        self.assertEqual(bounded, unbounded)
+        self.assertEqual(
+            [similar_ids for _, similar_ids, _ in bounded],
+            [
+                similar_ids for _, similar_ids, _
+                in get_neighbours(PythonSimilarity(*features))
+            ],
+        )
+
+    def test_peak_memory_is_bounded_by_budget(self):
+        engine = SparseSimilarity.from_features(*make_features(3000, 200, 10))
+        positions = list(range(512))
+
+        def measure(max_products):
+            with override_settings(SIMILAR_RECIPES_MAX_PRODUCTS=max_products):
+                tracemalloc.start()
+                try:
+                    for _ in engine.neighbours(positions, 10):
+                        pass
+                    return tracemalloc.get_traced_memory()[1]
+                finally:
+                    tracemalloc.stop()
+
+        self.assertLess(measure(20000), measure(10 ** 9) / 5)
+
+
+@skipIf(sparse is None, 'numpy and scipy are not installed')
+class SparseLoaderTests(TestCase):
+    def test_batched_loader_matches_feature_rows(self):
+        generator = random.Random(2)
+        author = create_user(1)
+        ingredients = create_ingredients(12)
+        tags = create_tags(3)
+        for _ in range(40):
+            create_recipe(
+                author, generator.sample(ingredients, 4),
+                generator.sample(tags, generator.randrange(3)),
+            )
+        create_recipe(author)
+        with mock.patch('recipes.similarity.QUERY_CHUNK_SIZE', 7):
+            engine = SparseSimilarity.from_database()
+        self.assertEqual(
+            get_neighbours(engine),
+            get_neighbours(SparseSimilarity.from_features(*load_features())),
+        )
+        self.assertEqual(
+            get_neighbours(engine),
+            get_neighbours(PythonSimilarity.from_database()),
+        )
@@ -0,0 +1,94 @@
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from recipes.models import Cart, Favorite, Recipe
+from recipes.tests.factories import create_recipes, create_user
+from recipes.trending import order_by_trending, update_trending_scores
+
+
+class TrendingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = create_user(1)
+        self.recipes = create_recipes(self.author, 5)
+        self.fan = create_user(2)
+        self.client = APIClient()
+
+    def list_ids(self, params):
+        response = self.client.get('/api/recipes/', params)
+        self.assertEqual(response.status_code, 200)
+        return [recipe['id'] for recipe in response.data['results']]
+
+    def test_trending_orders_whole_catalog(self):
+        first, second = self.recipes[1], self.recipes[3]
+        Favorite.objects.create(user=self.fan, recipe=first)
+        Cart.objects.create(user=self.fan, recipe=second)
+        self.assertEqual(update_trending_scores(), 2)
+        unscored = sorted(
+            (recipe.pk for recipe in self.recipes
+             if recipe not in (first, second)),
+            reverse=True,
+        )
+        self.assertEqual(
+            self.list_ids({'ordering': 'trending', 'limit': 10}),
+            [second.pk, first.pk, *unscored],
+        )
+        self.assertEqual(
+            self.list_ids({
+                'ordering': 'trending', 'pagination': 'cursor', 'limit': 10
+            }),
+            [second.pk, first.pk, *unscored],
+        )
+
+    def test_scores_outside_window_are_reset(self):
+        recipe = self.recipes[0]
+        Favorite.objects.create(user=self.fan, recipe=recipe)
+        update_trending_scores()
+        recipe.refresh_from_db()
+        self.assertGreater(recipe.trending_score, 0)
+        update_trending_scores(now=timezone.now() + timedelta(days=30))
+        self.assertFalse(Recipe.objects.filter(trending_score__gt=0).exists())
+
+    def test_trending_with_search_is_rejected(self):
+        response = self.client.get(
+            '/api/recipes/', {'ordering': 'trending', 'search': 'рецепт'}
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('ordering', response.data)
+
+    def test_trending_order_uses_index(self):
+        queryset = order_by_trending(Recipe.objects.all())[:6]
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+        self.assertIn('recipe_trending_idx', queryset.explain())
+
+    def test_score_update_only_invalidates_trending_lists(self):
+        etags = {
+            ordering: self.client.get('/api/recipes/', params)['ETag']
+            for ordering, params in (
+                ('default', {}), ('trending', {'ordering': 'trending'})
+            )
+        }
+        Favorite.objects.create(user=self.fan, recipe=self.recipes[0])
+        with self.captureOnCommitCallbacks(execute=True):
+            update_trending_scores()
+        for ordering, params in (
+            ('default', {}), ('trending', {'ordering': 'trending'})
+        ):
+            with self.subTest(ordering=ordering):
+                response = self.client.get(
+                    '/api/recipes/', params,
+                    HTTP_IF_NONE_MATCH=etags[ordering]
+                )
+                self.assertEqual(
+                    response.status_code,
+                    304 if ordering == 'default' else 200
+                )
+        self.assertEqual(
+            self.list_ids({'ordering': 'trending'})[0], self.recipes[0].pk
+        )
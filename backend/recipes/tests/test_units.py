@@ -0,0 +1,81 @@
+from decimal import Decimal
+from pathlib import Path
+from unittest import skipUnless
+
+from django.conf import settings
+from django.test import SimpleTestCase
+
+from recipes.ingredient_import import read_csv
+from recipes.units import (UNIT_TABLE, get_unit_key, normalize_unit, to_base,
+                           to_display_unit)
+
+INGREDIENTS_CSV = Path(settings.BASE_DIR).parent / 'data' / 'ingredients.csv'
+
+
+class NormalizeUnitTests(SimpleTestCase):
+    def test_spelling_variants(self):
+        cases = {
+            'Г.': ('г', Decimal(1)),
+            'гр': ('г', Decimal(1)),
+            'ст.л.': ('ст. л.', Decimal(1)),
+            'Ст. Л': ('ст. л.', Decimal(1)),
+            'ч.л.': ('ч. л.', Decimal(1)),
+            'шт': ('шт.', Decimal(1)),
+        }
+        for unit, expected in cases.items():
+            with self.subTest(unit=unit):
+                self.assertEqual(normalize_unit(unit), expected)
+
+    def test_conversions(self):
+        cases = {
+            'кг': ('г', Decimal(1000)),
+            'КГ.': ('г', Decimal(1000)),
+            'мг': ('г', Decimal('0.001')),
+            'л': ('мл', Decimal(1000)),
+            'литр': ('мл', Decimal(1000)),
+            'мл': ('мл', Decimal(1)),
+        }
+        for unit, expected in cases.items():
+            with self.subTest(unit=unit):
+                self.assertEqual(normalize_unit(unit), expected)
+
+    def test_unknown_unit_keeps_its_key(self):
+        self.assertEqual(normalize_unit('Ломтик'), ('ломтик', Decimal(1)))
+
+    @skipUnless(INGREDIENTS_CSV.exists(), 'data/ingredients.csv not found')
+    def test_units_from_ingredients_csv_are_known(self):
+        with open(INGREDIENTS_CSV, encoding='utf-8', newline='') as file:
+            units = {unit for _, unit in read_csv(file)}
+        self.assertIn('г', units)
+        for unit in units:
+            with self.subTest(unit=unit):
+                self.assertIn(get_unit_key(unit), UNIT_TABLE)
+                base_unit, _ = normalize_unit(unit)
+                self.assertEqual(normalize_unit(base_unit)[0], base_unit)
+
+
+class ConversionTests(SimpleTestCase):
+    def test_to_base(self):
+        self.assertEqual(to_base(2, 'кг'), (Decimal(2000), 'г'))
+        self.assertEqual(to_base(3, 'л'), (Decimal(3000), 'мл'))
+        self.assertEqual(to_base(1500, 'мг'), (Decimal('1.5'), 'г'))
+        self.assertEqual(to_base(2, 'ст.л.'), (Decimal(2), 'ст. л.'))
+
+    def test_to_display_unit(self):
+        cases = (
+            ((Decimal(2705), 'г'), (Decimal('2.705'), 'кг')),
+            ((Decimal(2000), 'г'), (Decimal(2), 'кг')),
+            ((Decimal(999), 'г'), (Decimal(999), 'г')),
+            ((Decimal('0.005'), 'г'), (Decimal('0.005'), 'г')),
+            ((Decimal(1300), 'мл'), (Decimal('1.3'), 'л')),
+            ((Decimal(3), 'шт.'), (Decimal(3), 'шт.')),
+        )
+        for (amount, unit), expected in cases:
+            with self.subTest(amount=amount, unit=unit):
+                self.assertEqual(to_display_unit(amount, unit), expected)
+
+    def test_display_amount_has_no_exponent(self):
+        amount, unit = to_display_unit(Decimal('1000.000'), 'мл')
+        self.assertEqual((str(amount), unit), ('1', 'л'))
+        amount, unit = to_display_unit(Decimal('10000'), 'шт.')
+        self.assertEqual(str(amount), '10000')
@@ -0,0 +1,70 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from recipes.cache import bump_version
+from recipes.models import Cart, Favorite, Recipe
+
+TRENDING_VERSION_KEY = 'version:trending'
+TRENDING_ORDERING = ('-trending_score', '-id')
+EVENT_WEIGHTS = {
+    Favorite: 1.0,
+    Cart: 2.0,
+}
+
+UPDATE_SCORES_SQL = '''
+    WITH events AS (
+        {events}
+    ), scores AS (
+        SELECT
+            recipe_id,
+            SUM(weight * exp(
+                -ln(2) * extract(epoch FROM %(now)s - created)
+                / %(half_life)s
+            )) AS score
+        FROM events
+        GROUP BY recipe_id
+    ), updated AS (
+        UPDATE {recipes} AS recipe
+        SET trending_score = scores.score
+        FROM scores
+        WHERE recipe.id = scores.recipe_id
+        RETURNING recipe.id
+    )
+    UPDATE {recipes}
+    SET trending_score = 0
+    WHERE trending_score <> 0 AND id NOT IN (SELECT id FROM updated)
+'''
+
+EVENTS_SQL = '''
+    SELECT recipe_id, created, {weight}::float AS weight
+    FROM {table}
+    WHERE created > %(since)s AND created <= %(now)s
+'''
+
+
+def update_trending_scores(now=None, window=None, half_life=None):
+    now = now or timezone.now()
+    window = window or timedelta(days=settings.TRENDING_WINDOW_DAYS)
+    half_life = half_life or timedelta(hours=settings.TRENDING_HALF_LIFE_HOURS)
+    events = '\n        UNION ALL\n'.join(
+        EVENTS_SQL.format(weight=float(weight), table=model._meta.db_table)
+        for model, weight in EVENT_WEIGHTS.items()
+    )
+    sql = UPDATE_SCORES_SQL.format(
+        events=events, recipes=Recipe._meta.db_table
+    )
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(sql, {
+            'now': now,
+            'since': now - window,
+            'half_life': half_life.total_seconds(),
+        })
+        bump_version(TRENDING_VERSION_KEY)
+    return Recipe.objects.filter(trending_score__gt=0).count()
+
+
+def order_by_trending(queryset):
+    return queryset.order_by(*TRENDING_ORDERING)
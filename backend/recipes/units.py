@@ -0,0 +1,113 @@
+from decimal import Decimal
+
+from django.db.models import (Case, CharField, DecimalField, F, Func, Value,
+                              When)
+from django.db.models.functions import Lower, Replace
+
+MASS = 'г'
+VOLUME = 'мл'
+
+UNITS = {
+    'мг': (MASS, Decimal('0.001')),
+    'г': (MASS, Decimal(1)),
+    'кг': (MASS, Decimal(1000)),
+    'мл': (VOLUME, Decimal(1)),
+    'л': (VOLUME, Decimal(1000)),
+}
+
+COUNTABLE_UNITS = (
+    'шт.', 'по вкусу', 'ст. л.', 'ч. л.', 'стакан', 'горсть', 'щепотка',
+    'упаковка', 'банка', 'кусок', 'пакет', 'капля', 'пучок', 'веточка',
+    'тушка', 'стручок', 'бутылка', 'пакетик', 'звездочка', 'долька',
+    'зубчик', 'пласт', 'пачка', 'батон', 'лист', 'стебель',
+)
+
+UNIT_ALIASES = {
+    'гр': 'г',
+    'грамм': 'г',
+    'кило': 'кг',
+    'килограмм': 'кг',
+    'миллилитр': 'мл',
+    'литр': 'л',
+    'штука': 'шт.',
+    'штук': 'шт.',
+    'столовая ложка': 'ст. л.',
+    'чайная ложка': 'ч. л.',
+}
+
+DISPLAY_UNITS = {
+    MASS: (('кг', Decimal(1000)), ('г', Decimal(1))),
+    VOLUME: (('л', Decimal(1000)), ('мл', Decimal(1))),
+}
+
+
+def get_unit_key(unit):
+    return unit.lower().replace(' ', '').rstrip('.')
+
+
+def build_unit_table():
+    table = {}
+    for unit in COUNTABLE_UNITS:
+        table[get_unit_key(unit)] = (unit, Decimal(1))
+    for unit, conversion in UNITS.items():
+        table[get_unit_key(unit)] = conversion
+    for alias, unit in UNIT_ALIASES.items():
+        table[get_unit_key(alias)] = table[get_unit_key(unit)]
+    return table
+
+
+UNIT_TABLE = build_unit_table()
+BASE_UNITS = {unit for unit, _ in UNIT_TABLE.values()}
+
+
+def normalize_unit(unit):
+    key = get_unit_key(unit)
+    return UNIT_TABLE.get(key, (key, Decimal(1)))
+
+
+def to_base(amount, unit):
+    base_unit, factor = normalize_unit(unit)
+    return Decimal(amount) * factor, base_unit
+
+
+def unit_key_expression(field):
+    return Func(
+        Replace(Lower(field), Value(' '), Value('')), Value('.'),
+        function='RTRIM', output_field=CharField(),
+    )
+
+
+def alias_units(queryset, field):
+    queryset = queryset.alias(unit_key=unit_key_expression(field))
+    return queryset.alias(
+        base_unit=Case(
+            *(
+                When(unit_key=key, then=Value(unit))
+                for key, (unit, _) in UNIT_TABLE.items() if unit != key
+            ),
+            default=F('unit_key'),
+            output_field=CharField(),
+        ),
+        unit_factor=Case(
+            *(
+                When(unit_key=key, then=Value(factor))
+                for key, (_, factor) in UNIT_TABLE.items() if factor != 1
+            ),
+            default=Value(Decimal(1)),
+            output_field=DecimalField(),
+        ),
+    )
+
+
+def to_display_unit(amount, unit):
+    for display_unit, factor in DISPLAY_UNITS.get(unit, ()):
+        if amount >= factor:
+            return normalize_amount(amount / factor), display_unit
+    return normalize_amount(amount), unit
+
+
+def normalize_amount(amount):
+    amount = Decimal(amount).normalize()
+    if amount == amount.to_integral_value():
+        return amount.quantize(Decimal(1))
+    return amount
@@ -5,7 +5,24 @@ from django.core.validators import RegexValidator
 from django.db import models
 
 
-class CustomUser(AbstractUser):
+class CountersMixin:
+    counter_fields = ()
+
+    def save(self, *args, **kwargs):
+        if (
+            not self._state.adding
+            and kwargs.get('update_fields') is None
+            and self.counter_fields
+        ):
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in self.counter_fields
+            ]
+        super().save(*args, **kwargs)
+
+
+class CustomUser(CountersMixin, AbstractUser):
     username = models.CharField(
         max_length=150,
         unique=True,
@@ -38,9 +55,20 @@ class CustomUser(AbstractUser):
         null=False,
         verbose_name='Фамилия',
     )
+    recipes_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Количество рецептов',
+    )
+    followers_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Количество подписчиков',
+    )
 
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ('username', 'first_name', 'last_name')
+    counter_fields = ('recipes_count', 'followers_count')
 
     class Meta:
         verbose_name = 'Пользователь'
@@ -0,0 +1,50 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from recipes import feed
+from recipes.cache import (USERS_VERSION_KEY, bump_user_state_version,
+                           bump_version)
+from recipes.counters import increment
+from recipes.tasks import enqueue
+from users.models import Follow
+
+User = get_user_model()
+
+
+@receiver((post_save, post_delete), sender=User)
+def invalidate_users(update_fields=None, **kwargs):
+    if update_fields is not None and set(update_fields) == {'last_login'}:
+        return
+    bump_version(USERS_VERSION_KEY)
+
+
+@receiver((post_save, post_delete), sender=Follow)
+def invalidate_user_state(instance, **kwargs):
+    bump_user_state_version(instance.user_id)
+
+
+@receiver(post_save, sender=Follow)
+def add_author_to_feed(instance, created, **kwargs):
+    if created:
+        enqueue(feed.invalidate_feeds, [instance.user_id])
+
+
+@receiver(post_delete, sender=Follow)
+def remove_author_from_feed(instance, **kwargs):
+    enqueue(feed.invalidate_feeds, [instance.user_id])
+
+
+@receiver(post_save, sender=Follow)
+def increment_followers_count(instance, created, **kwargs):
+    if created:
+        increment(
+            User.objects.filter(pk=instance.author_id), 'followers_count'
+        )
+
+
+@receiver(post_delete, sender=Follow)
+def decrement_followers_count(instance, **kwargs):
+    increment(
+        User.objects.filter(pk=instance.author_id), 'followers_count', -1
+    )